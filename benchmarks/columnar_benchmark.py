@@ -0,0 +1,44 @@
+"""Columnar output versus converting the dictify mapping to arrays.
+
+Times a ten-year daily `visits` series through both paths:
+
+    $ python benchmarks/columnar_benchmark.py [days]
+"""
+import datetime
+import os
+import sys
+import timeit
+
+import numpy
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+sys.path.insert(0, ROOT)  # run from a source checkout without installing
+
+from similarweb import helpers
+
+
+def main(days = 3650):
+    first = datetime.date(2005, 1, 1)
+    values = [{"Date": str(first + datetime.timedelta(days = i)), "Value": i * 1.5}
+              for i in range(days)]
+
+    def dict_then_arrays():
+        series = helpers.dictify(values, "Date", "Value")
+        return (numpy.array(list(series.keys()), dtype = "datetime64[D]"),
+                numpy.array(list(series.values()), dtype = "float64"))
+
+    def columnar():
+        return helpers.columnar(values, "Date", "Value",
+                                keys_dtype = "datetime64[D]")
+
+    repeat = 200
+    before = min(timeit.repeat(dict_then_arrays, number = repeat, repeat = 3))
+    after = min(timeit.repeat(columnar, number = repeat, repeat = 3))
+    print("{0} daily values".format(days))
+    print("dictify then arrays:  {0:.3f} ms".format(before / repeat * 1000))
+    print("columnar:             {0:.3f} ms".format(after / repeat * 1000))
+    print("speedup:              {0:.2f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,54 @@
+"""JSON decode cost per `*_good_response.json` fixture and decoder.
+
+"text" is the previous path: decode the body to str, then parse it with
+simplejson or json. The other rows parse the body bytes directly.
+
+    $ python benchmarks/decode_benchmark.py [repeat]
+"""
+import glob
+import os
+import sys
+import timeit
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+sys.path.insert(0, ROOT)  # run from a source checkout without installing
+
+from similarweb import decoders
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "*_good_response.json")
+
+
+def main(repeat = 2000):
+    bodies = []
+    for f in sorted(glob.glob(FIXTURES)):
+        with open(f, "rb") as data_file:
+            bodies.append(data_file.read())
+    total_bytes = sum(len(body) for body in bodies)
+
+    def text_path():
+        for body in bodies:
+            json.loads(body.decode("utf-8"))
+
+    paths = [("text ({0})".format(json.__name__), text_path)]
+    for name in decoders.available():
+        loads = decoders.load(name)[1]
+        paths.append((name, lambda loads = loads: [loads(b) for b in bodies]))
+
+    print("{0} fixtures, {1} bytes, {2} passes".format(len(bodies), total_bytes,
+                                                       repeat))
+    baseline = None
+    for label, fn in paths:
+        seconds = min(timeit.repeat(fn, number = repeat, repeat = 3))
+        baseline = baseline or seconds
+        print("{0:<20} {1:8.2f} us/pass  {2:6.1f} MB/s  {3:5.2f}x".format(
+            label, seconds / repeat * 1e6,
+            total_bytes * repeat / seconds / 1e6, baseline / seconds))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,251 @@
+"""End-to-end cost of every client endpoint, phase by phase.
+
+For each endpoint of TrafficClient, ContentClient, SourcesClient and
+MobileClient the phases are:
+
+    url        building the URL (the response is a request failure, so
+               classification returns at once)
+    decode     decoders.loads of the endpoint's good fixture
+    classify   building the URL, classifying the decoded fixture and
+               post-processing it into the value the caller receives
+    dictify    helpers.dictify over the fixture's lists, where used
+    roundtrip  full calls against the local stub server (see
+               similarweb.stubserver) at each concurrency level
+
+Every result reports ops/sec, p50/p99 latency in microseconds and the
+peak memory traced by tracemalloc over a separate, shorter pass. The
+stub server shares the process unless --api-root names one started with
+`python -m similarweb.stubserver`. Output is JSON, for comparing runs:
+
+    $ python benchmarks/endpoints_benchmark.py --calls 2000 --output before.json
+    $ python benchmarks/endpoints_benchmark.py --concurrency 1 16 --endpoints visits
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+sys.path.insert(0, ROOT)  # run from a source checkout without installing
+
+from similarweb import ContentClient, MobileClient, SourcesClient, TrafficClient
+from similarweb import Transport, __version__
+from similarweb import decoders, helpers
+from similarweb.stubserver import StubServer
+from similarweb.transport import RetryPolicy
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+MONTHS = ("11-2014", "12-2014")
+DOMAIN = ("example.com",)
+APP = ("com.yahoo.mobile.client.android.mail",)
+VALUES = [("Values", "Date", "Value")]
+
+# (client class, method, arguments, fixture prefix, dictify calls)
+ENDPOINTS = [
+    (TrafficClient, "traffic", DOMAIN, "traffic_client_traffic",
+     [("TopCountryShares", "CountryCode", "TrafficShare"),
+      ("TrafficReach", "Date", "Value"),
+      ("TrafficShares", "SourceType", "SourceValue")]),
+    (TrafficClient, "visits", DOMAIN + ("monthly",) + MONTHS,
+     "traffic_client_visits", VALUES),
+    (TrafficClient, "page_views", DOMAIN + ("monthly",) + MONTHS,
+     "traffic_client_page_views", VALUES),
+    (TrafficClient, "visit_duration", DOMAIN + ("monthly",) + MONTHS,
+     "traffic_client_visit_duration", VALUES),
+    (TrafficClient, "bounce_rate", DOMAIN + ("monthly",) + MONTHS,
+     "traffic_client_bounce_rate", VALUES),
+    (ContentClient, "similar_sites", DOMAIN, "content_client_similar_sites",
+     [("SimilarSites", "Url", "Score")]),
+    (ContentClient, "also_visited", DOMAIN, "content_client_also_visited",
+     [("AlsoVisited", "Url", "Score")]),
+    (ContentClient, "tags", DOMAIN, "content_client_tags",
+     [("Tags", "Name", "Score")]),
+    (ContentClient, "category", DOMAIN, "content_client_category", []),
+    (ContentClient, "category_rank", DOMAIN, "content_client_category_rank", []),
+    (SourcesClient, "organic_search_keywords", DOMAIN + (1,) + MONTHS,
+     "sources_client_organic_search_keywords", []),
+    (SourcesClient, "organic_keyword_competitors", DOMAIN + (1,) + MONTHS,
+     "sources_client_organic_keyword_competitors", []),
+    (SourcesClient, "paid_keyword_competitors", DOMAIN + (1,) + MONTHS,
+     "sources_client_paid_keyword_competitors", []),
+    (SourcesClient, "paid_search_keywords", DOMAIN + (1,) + MONTHS,
+     "sources_client_paid_search_keywords", []),
+    (SourcesClient, "referrals", DOMAIN + (1,) + MONTHS,
+     "sources_client_referrals", []),
+    (SourcesClient, "social_referrals", DOMAIN, "sources_client_social_referrals",
+     [("SocialSources", "Source", "Value")]),
+    (SourcesClient, "destinations", DOMAIN, "sources_client_destinations", []),
+    (MobileClient, "app_details", APP + ("google",), "mobile_client_app_details", []),
+    (MobileClient, "google_app_installs", APP, "mobile_client_google_app_installs", []),
+    (MobileClient, "site_related_apps", APP + ("google",),
+     "mobile_client_site_related_apps", [("RelatedApps", "AppId", "Title")]),
+]
+
+
+def canned_client(client_class, respond):
+    """A client whose `_get` answers `respond()` without a round trip."""
+    client = client_class("bench_key", single_flight = False)
+    client._get = lambda url: respond()
+    return client
+
+
+def percentile(sorted_values, share):
+    index = min(len(sorted_values) - 1, int(round(share * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(durations, elapsed):
+    durations = sorted(durations)
+    return {"calls": len(durations),
+            "ops_per_sec": round(len(durations) / elapsed, 1),
+            "p50_us": round(percentile(durations, 0.50) * 1e6, 2),
+            "p99_us": round(percentile(durations, 0.99) * 1e6, 2)}
+
+
+def run(fn, calls, concurrency = 1):
+    """Call `fn` `calls` times over `concurrency` threads; time each call."""
+    durations = []
+    clock = time.perf_counter
+
+    def worker(count):
+        timed = []
+        for _ in range(count):
+            started = clock()
+            fn()
+            timed.append(clock() - started)
+        durations.extend(timed)
+
+    shares = [calls // concurrency + (i < calls % concurrency)
+              for i in range(concurrency)]
+    started = clock()
+    if concurrency == 1:
+        worker(calls)
+    else:
+        with ThreadPoolExecutor(max_workers = concurrency) as executor:
+            list(executor.map(worker, shares))
+    return summarize(durations, clock() - started)
+
+
+def peak_kib(fn, calls, concurrency = 1):
+    tracemalloc.start()
+    try:
+        run(fn, calls, concurrency)
+        return round(tracemalloc.get_traced_memory()[1] / 1024.0, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, calls, concurrency = 1, memory_calls = None):
+    result = run(fn, calls, concurrency)
+    result["concurrency"] = concurrency
+    result["peak_kib"] = peak_kib(fn, memory_calls or min(calls, 100), concurrency)
+    return result
+
+
+def local_phases(client_class, method, args, body, dictify_calls, calls):
+    decoded = decoders.loads(body)
+
+    url_client = canned_client(client_class, lambda: helpers.BAD_TRANSPORT)
+    # A shallow copy is enough: classifiers replace keys, never edit lists
+    full_client = canned_client(client_class, lambda: dict(decoded))
+
+    phases = [
+        ("url", lambda: getattr(url_client, method)(*args)),
+        ("decode", lambda: decoders.loads(body)),
+        ("classify", lambda: getattr(full_client, method)(*args)),
+    ]
+    if dictify_calls:
+        def dictify():
+            for key, to_be_keys, to_be_values in dictify_calls:
+                helpers.dictify(decoded[key], to_be_keys, to_be_values)
+        phases.append(("dictify", dictify))
+    return [(phase, measure(fn, calls)) for phase, fn in phases]
+
+
+def roundtrip(client_class, method, args, api_root, calls, concurrency):
+    transport = Transport(pool_connections = 1, pool_maxsize = concurrency,
+                          retry = RetryPolicy(max_attempts = 1))
+    client = client_class("bench_key", transport = transport,
+                          single_flight = False, api_root = api_root)
+    errors = []
+
+    def call():
+        response = getattr(client, method)(*args)
+        if helpers.is_request_failure(response):
+            errors.append(response)
+
+    try:
+        result = measure(call, max(calls, 2 * concurrency), concurrency,
+                         memory_calls = concurrency)
+    finally:
+        transport.close()
+    result["errors"] = len(errors)
+    return result
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--calls", type = int, default = 1000,
+                        help = "calls per endpoint, phase and concurrency")
+    parser.add_argument("--concurrency", type = int, nargs = "+",
+                        default = [1, 16, 128, 1024])
+    parser.add_argument("--endpoints", nargs = "+",
+                        help = "only these methods, e.g. visits referrals")
+    parser.add_argument("--api-root", help = "an already running stub server")
+    parser.add_argument("--skip-roundtrip", action = "store_true")
+    parser.add_argument("--output", help = "write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    server = None
+    api_root = args.api_root
+    if api_root is None and not args.skip_roundtrip:
+        server = StubServer(FIXTURES).start()
+        api_root = server.url
+
+    results = []
+    try:
+        for client_class, method, call_args, prefix, dictify_calls in ENDPOINTS:
+            if args.endpoints and method not in args.endpoints:
+                continue
+            name = "{0}.{1}".format(client_class.__name__, method)
+            with open(os.path.join(FIXTURES, prefix + "_good_response.json"),
+                      "rb") as fixture:
+                body = fixture.read()
+
+            for phase, result in local_phases(client_class, method, call_args,
+                                              body, dictify_calls, args.calls):
+                results.append(dict(endpoint = name, phase = phase, **result))
+            if args.skip_roundtrip:
+                continue
+            for concurrency in args.concurrency:
+                result = roundtrip(client_class, method, call_args, api_root,
+                                   args.calls, concurrency)
+                results.append(dict(endpoint = name, phase = "roundtrip", **result))
+            sys.stderr.write("{0} done\n".format(name))
+    finally:
+        if server is not None:
+            server.stop()
+
+    report = {"meta": {"similarweb": __version__,
+                       "python": platform.python_version(),
+                       "implementation": platform.python_implementation(),
+                       "platform": platform.platform(),
+                       "decoder": decoders.current(),
+                       "stub_server": "external" if args.api_root else "in-process",
+                       "timestamp": int(time.time())},
+              "results": results}
+    output = json.dumps(report, indent = 2, sort_keys = True)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""DataFrame adapters versus converting the default dict results.
+
+Times a ten-year daily `visits` series and a 1,000-row keyword page:
+
+    $ python benchmarks/frames_benchmark.py
+"""
+import datetime
+import os
+import sys
+import timeit
+
+import pandas
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+sys.path.insert(0, ROOT)  # run from a source checkout without installing
+
+from similarweb import frames
+from similarweb import helpers
+
+
+def compare(label, dict_then_frame, direct, repeat = 200):
+    before = min(timeit.repeat(dict_then_frame, number = repeat, repeat = 3))
+    after = min(timeit.repeat(direct, number = repeat, repeat = 3))
+    print("{0:<24} dict->frame {1:7.3f} ms   direct {2:7.3f} ms   {3:5.2f}x".format(
+        label, before / repeat * 1000, after / repeat * 1000, before / after))
+
+
+def main():
+    first = datetime.date(2005, 1, 1)
+    values = [{"Date": str(first + datetime.timedelta(days = i)), "Value": i * 1.5}
+              for i in range(3650)]
+    rows = [{"SearchTerm": "term {0}".format(i), "Visits": 1.0 / (i + 1),
+             "Change": -0.1} for i in range(1000)]
+
+    def visits_via_dict():
+        series = helpers.dictify(values, "Date", "Value")
+        frame = pandas.DataFrame.from_dict(series, orient = "index",
+                                           columns = ["Value"])
+        frame.index = pandas.to_datetime(frame.index)
+        return frame
+
+    def keywords_via_dict():
+        page = {"Data": rows}
+        return pandas.DataFrame([dict(row) for row in page["Data"]])
+
+    compare("visits (daily, 10y)", visits_via_dict,
+            lambda: frames.time_series(values))
+    compare("keyword page (1000)", keywords_via_dict,
+            lambda: frames.records(rows, None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Startup cost of `import similarweb`, from `python -X importtime`.
+
+Each run imports the package in a fresh interpreter, after one warm-up
+run that writes the bytecode caches, as an installed copy would have.
+Prints the median cumulative import time, the slowest modules it pulls
+in, and any heavy dependency that loaded eagerly though it should wait
+for first use. Exits 1 when the median is over --budget-ms or a heavy
+dependency loaded, so it can gate a build:
+
+    $ python benchmarks/import_benchmark.py [--runs 20] [--budget-ms 15] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+
+# Loaded on first network use, first async client or first SQLite store
+LAZY = ("requests", "urllib3", "simplejson", "orjson", "json", "sqlite3",
+        "asyncio", "aiohttp", "concurrent.futures", "email.utils", "numpy", "pandas",
+        "pyarrow")
+
+SCRIPT = ("import sys, similarweb; "
+          "sys.stdout.write(' '.join(m for m in {0!r} if m in sys.modules))").format(LAZY)
+
+
+def import_once(env):
+    run = subprocess.run([sys.executable, "-X", "importtime", "-c", SCRIPT],
+                         cwd = ROOT, env = env, capture_output = True,
+                         universal_newlines = True, check = True)
+    modules = []
+    for line in run.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name[1:], int(self_us), int(cumulative_us)))
+
+    # Children are listed, indented, before the import that caused them
+    end = max(i for i, module in enumerate(modules) if module[0] == "similarweb")
+    start = end
+    while start > 0 and modules[start - 1][0].startswith(" "):
+        start -= 1
+    package = [(name.strip(), self_us, cumulative_us)
+               for name, self_us, cumulative_us in modules[start:end + 1]]
+    return modules[end][2], package, run.stdout.split()
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--runs", type = int, default = 20)
+    parser.add_argument("--budget-ms", type = float, default = 15)
+    parser.add_argument("--top", type = int, default = 10)
+    parser.add_argument("--json", action = "store_true")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, env.get("PYTHONPATH")]))
+    import_once(env)
+
+    runs = sorted((import_once(env) for _ in range(args.runs)), key = lambda run: run[0])
+    total, modules, eager = runs[len(runs) // 2]
+    slowest = sorted(modules, key = lambda module: -module[1])[:args.top]
+
+    report = {"python": sys.version.split()[0],
+              "runs": args.runs,
+              "median_ms": total / 1000.0,
+              "min_ms": runs[0][0] / 1000.0,
+              "budget_ms": args.budget_ms,
+              "eager_dependencies": eager,
+              "slowest": [{"module": name, "self_ms": self_us / 1000.0,
+                           "cumulative_ms": cumulative_us / 1000.0}
+                          for name, self_us, cumulative_us in slowest]}
+    if args.json:
+        print(json.dumps(report, indent = 2, sort_keys = True))
+    else:
+        print("import similarweb: {0:.1f} ms median, {1:.1f} ms min over {2} runs "
+              "(budget {3:.0f} ms)".format(report["median_ms"], report["min_ms"],
+                                          args.runs, args.budget_ms))
+        print("eager heavy dependencies: {0}".format(", ".join(eager) or "none"))
+        for module in report["slowest"]:
+            print("  {0:<32} {1:7.2f} ms self {2:7.2f} ms cumulative".format(
+                module["module"], module["self_ms"], module["cumulative_ms"]))
+
+    if eager or report["median_ms"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Per-call latency of bare requests.get versus the pooled Transport.
+
+Runs the local stub server (see `similarweb.stubserver`) and times
+sequential `TrafficClient.visits` calls against it.
+
+    $ python benchmarks/transport_benchmark.py [calls]
+"""
+import os
+import sys
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.realpath(__file__)), "..")
+sys.path.insert(0, ROOT)  # run from a source checkout without installing
+
+from similarweb import TrafficClient, Transport
+from similarweb.stubserver import StubServer
+
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+
+
+class BareRequestsTransport(object):
+    """The pre-Transport behaviour: a new connection for every call."""
+
+    def get(self, url):
+        return requests.get(url)
+
+
+def time_calls(transport, api_root, calls):
+    client = TrafficClient("bench_key", transport = transport,
+                           api_root = api_root)
+    start = time.time()
+    for _ in range(calls):
+        client.visits("example.com", "monthly", "11-2014", "12-2014")
+    return (time.time() - start) / calls
+
+
+def main(calls = 500):
+    with StubServer(FIXTURES) as server:
+        bare = time_calls(BareRequestsTransport(), server.url, calls)
+        pooled = time_calls(Transport(), server.url, calls)
+
+    print("calls per run:        {0}".format(calls))
+    print("bare requests.get:    {0:.3f} ms/call".format(bare * 1000))
+    print("pooled Transport:     {0:.3f} ms/call".format(pooled * 1000))
+    print("speedup:              {0:.2f}x".format(bare / pooled))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -12,15 +12,26 @@ setup(
   author = "Dan Wagner",
   author_email = "danwagnerco@gmail.com",
   url = "https://github.com/danwagnerco/similarweb",
+  python_requires = ">=3.7",
   install_requires = [
       "requests>=2.7.0"
       ],
+  extras_require = {
+      "fast": ["orjson"],
+      "async": ["aiohttp"]
+      },
   classifiers = [
       "Development Status :: 3 - Alpha",
       "Environment :: Console",
       "Intended Audience :: Developers",
       "Operating System :: OS Independent",
-      "Programming Language :: Python"
+      "Programming Language :: Python",
+      "Programming Language :: Python :: 3 :: Only",
+      "Programming Language :: Python :: 3.7",
+      "Programming Language :: Python :: 3.8",
+      "Programming Language :: Python :: 3.9",
+      "Programming Language :: Python :: 3.10",
+      "Programming Language :: Python :: 3.11"
       ],
   keywords = "similarweb"
 )
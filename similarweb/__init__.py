@@ -2,6 +2,26 @@ from .similarweb import TrafficClient
 from .similarweb import ContentClient
 from .similarweb import SourcesClient
 from .similarweb import MobileClient
+from .transport import Transport
+from .cache import MemoryCache
+from .cache import SqliteCache
+from .store import MemorySeriesStore
+from .store import SqliteSeriesStore
+from .ratelimit import RateLimiter
+from .keypool import KeyPool
+from .metrics import Metrics
+from .hooks import Hooks
+
+_ASYNC_CLIENTS = ("AsyncTrafficClient", "AsyncContentClient",
+                  "AsyncSourcesClient", "AsyncMobileClient")
+
+
+def __getattr__(name):
+    # The async clients pull in asyncio, so they load on first access
+    if name in _ASYNC_CLIENTS:
+        from . import aio
+        return getattr(aio, name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
 
 __title__ = "similarweb"
 __author__ = "Dan Wagner"
@@ -0,0 +1,424 @@
+import asyncio
+import copy
+import time
+
+from . import helpers
+from .hooks import Call
+from .keypool import KeyPool
+from .similarweb import TrafficClient
+from .similarweb import ContentClient
+from .similarweb import SourcesClient
+from .similarweb import MobileClient
+from .similarweb import _Request
+from .transport import RetryPolicy
+
+
+class _Response(object):
+    """An HTTP response read in full, as decode_http_response expects."""
+
+    def __init__(self, status_code, headers, content, attempts, received):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.attempts = attempts
+        self.received = received
+
+
+class AsyncTransport(object):
+    """Pooled keep-alive HTTP transport for the async clients.
+
+    The asyncio counterpart of `Transport`, built on aiohttp (install
+    the "async" extra). All async clients share one unless given their
+    own; each event loop gets its own pool of up to `pool_maxsize`
+    connections. Transient failures are retried according to `retry`
+    without blocking the loop.
+    """
+
+    def __init__(self, pool_maxsize = 100, timeout = 30, keep_alive = True,
+                 retry = RetryPolicy()):
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.retry = retry
+
+        import aiohttp
+
+        self._aiohttp = aiohttp
+        # Failures meaning the API could not be reached
+        self.errors = (aiohttp.ClientError, asyncio.TimeoutError)
+        self._session = None
+        self._loop = None
+
+    def session(self):
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            aiohttp = self._aiohttp
+            connector = aiohttp.TCPConnector(limit = self.pool_maxsize,
+                                             force_close = not self.keep_alive)
+            self._session = aiohttp.ClientSession(
+                connector = connector,
+                timeout = aiohttp.ClientTimeout(total = self.timeout))
+            self._loop = loop
+        return self._session
+
+    async def get(self, url, retry_throttled = True):
+        """GET `url`, retrying transient failures.
+
+        Returns the last response, read in full, with the number of
+        attempts made in `attempts` and the time its headers arrived in
+        `received`, or raises the last error in `errors` once the retry
+        policy gives up. With `retry_throttled` False a 429 is returned
+        at once.
+        """
+        started = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with self.session().get(url) as raw:
+                    received = time.time()
+                    content = await raw.read()
+            except self.errors:
+                delay = None
+                if self.retry is not None:
+                    delay = self.retry.next_delay(attempt, started)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            response = _Response(raw.status, raw.headers, content, attempt,
+                                 received)
+            if (self.retry is None or not self.retry.is_transient(response) or
+                    (response.status_code == 429 and not retry_throttled)):
+                return response
+            delay = self.retry.next_delay(attempt, started, response)
+            if delay is None:
+                return response
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+_default_transport = None
+_default_users = 0
+
+
+def _acquire_default_transport():
+    global _default_transport, _default_users
+    if _default_transport is None:
+        _default_transport = AsyncTransport()
+    _default_users += 1
+    return _default_transport
+
+
+async def _release_default_transport():
+    global _default_users
+    _default_users -= 1
+    if _default_users == 0:
+        await _default_transport.close()
+
+
+async def send_http_request(url, transport, retry_throttled = True):
+    """Return the HTTP response for `url`, or BAD_TRANSPORT.
+
+    With `retry_throttled` False an `AsyncTransport` returns a 429
+    instead of retrying it; other transports are called as before.
+    """
+    try:
+        if not retry_throttled and isinstance(transport, AsyncTransport):
+            return await transport.get(url, retry_throttled = False)
+        return await transport.get(url)
+    except transport.errors:
+        return helpers.BAD_TRANSPORT
+
+
+class _Flight(object):
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight(object):
+    """Coalesces identical requests made at the same time by tasks.
+
+    The first caller of `do` for a key runs the request; tasks of the
+    same event loop arriving with that key while it is in flight await
+    it and receive a copy of its result.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        key = (asyncio.get_running_loop(), key)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._flights.pop(key, None))
+            result = await asyncio.shield(flight.task)
+            return copy.deepcopy(result) if flight.waiters else result
+        flight.waiters += 1
+        self.coalesced += 1
+        return copy.deepcopy(await asyncio.shield(flight.task))
+
+
+_default_group = AsyncSingleFlight()
+
+
+class _AsyncClient(object):
+    """Runs a client's endpoints natively on the running event loop.
+
+    URLs are built and responses classified exactly as by the synchronous
+    client, kept in `client`; the requests go through `transport`, an
+    `AsyncTransport` shared by all async clients unless one is passed;
+    any object with a coroutine `get(url)` and the `errors` it raises
+    when the API is unreachable will do.
+    At most `max_concurrency` requests of a client are on the wire at
+    once; further calls wait their turn without tying up a thread. The
+    other options work as for the synchronous clients, and a shared
+    `rate_limiter` paces requests by awaiting instead of sleeping.
+    Close the client with `await client.close()` or `async with`.
+    """
+
+    client_class = None
+
+    def __init__(self, user_key, transport = None, max_concurrency = 64,
+                 cache = None, rate_limiter = None, single_flight = True,
+                 api_root = None, metrics = None, hooks = None):
+        self.client = self.client_class(user_key, api_root = api_root,
+                                        single_flight = False)
+        self._owns_default = transport is None
+        if transport is None:
+            transport = _acquire_default_transport()
+        self.transport = transport
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.hooks = hooks
+        if single_flight is True:
+            single_flight = _default_group
+        self.single_flight = single_flight or None
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    @property
+    def user_key(self):
+        return self.client.user_key
+
+    def _slots(self):
+        loop = asyncio.get_running_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call(self, endpoint, *args, **kwargs):
+        plan = getattr(self.client_class, endpoint).plan
+        request = plan(self.client, *args, **kwargs)
+        if self.hooks is None:
+            result = await self._execute(endpoint, request, None)
+        else:
+            call = Call(endpoint)
+            with self.hooks.span(call) as span:
+                try:
+                    call.result = await self._execute(endpoint, request, call)
+                except Exception as e:
+                    self.hooks.raised(call, span, e)
+                    raise
+                self.hooks.returned(call, span)
+            result = call.result
+        if self.metrics is not None:
+            self.metrics.outcome(endpoint, result)
+        return result
+
+    async def _execute(self, endpoint, request, call):
+        if not isinstance(request, _Request):
+            return request
+        return request.classify(await self._get(endpoint, request.url, call))
+
+    async def _get(self, endpoint, url, call):
+        if self.cache is not None:
+            response = self.cache.get(url)
+            if response is not None:
+                if self.metrics is not None:
+                    self.metrics.cache_hit(endpoint)
+                if call is not None:
+                    call.cached = True
+                    call.request(url)
+                return response
+            if self.cache.offline:
+                return helpers.BAD_OFFLINE_MISS
+
+        if self.single_flight is not None:
+            key = (helpers.request_key(url), str(self.user_key))
+            return await self.single_flight.do(
+                key, lambda: self._fetch(endpoint, url, call))
+        return await self._fetch(endpoint, url, call)
+
+    async def _fetch(self, endpoint, url, call):
+        if isinstance(self.user_key, KeyPool):
+            response = await self._send_with_key_pool(endpoint, url, call)
+        else:
+            response = await self._send(endpoint, url, self.user_key, call)
+
+        if self.cache is not None and helpers.is_cacheable(response):
+            self.cache.set(url, response)
+        return response
+
+    async def _send_with_key_pool(self, endpoint, url, call):
+        pool = self.user_key
+        while True:
+            key = pool.acquire()
+            if key is None:
+                return pool.exhausted()
+            response = await self._send(endpoint, helpers.with_user_key(url, key),
+                                        key, call, pooled = True)
+            if not pool.record(key, response):
+                return response
+
+    async def _send(self, endpoint, url, user_key, call, pooled = False):
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.reserve(user_key, helpers.endpoint_name(url))
+            if wait is None:
+                return helpers.BAD_QUOTA_EXCEEDED
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+        async with self._slots():
+            if call is not None:
+                self.hooks.requesting(call, url)
+            started = time.time()
+            # A pooled key that is throttled goes back to the pool for rotation
+            response = await send_http_request(url, self.transport,
+                                               retry_throttled = not pooled)
+        downloaded_at = time.time()
+        headers_at = getattr(response, "received", downloaded_at)
+        size = 0 if helpers.is_request_failure(response) else len(response.content)
+        result = helpers.decode_http_response(response)
+        decoded_at = time.time()
+
+        if self.metrics is not None:
+            self.metrics.request(endpoint, decoded_at - started, size)
+        if call is not None:
+            self.hooks.responded(call, response, {"ttfb": headers_at - started,
+                                                  "download": downloaded_at - headers_at,
+                                                  "decode": decoded_at - downloaded_at})
+        return result
+
+    async def close(self):
+        """Let go of the shared transport; the last client closes its pool."""
+        if self._owns_default:
+            self._owns_default = False
+            await _release_default_transport()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+class AsyncTrafficClient(_AsyncClient):
+    client_class = TrafficClient
+
+    async def traffic(self, url, as_frame = False):
+        return await self._call("traffic", url, as_frame = as_frame)
+
+    async def visits(self, url, gr, start, end, md = False,
+                     columnar = False, as_frame = False):
+        return await self._call("visits", url, gr, start, end, md,
+                                columnar = columnar, as_frame = as_frame)
+
+    async def page_views(self, url, gr, start, end, md = False,
+                         columnar = False, as_frame = False):
+        return await self._call("page_views", url, gr, start, end, md,
+                                columnar = columnar, as_frame = as_frame)
+
+    async def visit_duration(self, url, gr, start, end, md = False,
+                             columnar = False, as_frame = False):
+        return await self._call("visit_duration", url, gr, start, end, md,
+                                columnar = columnar, as_frame = as_frame)
+
+    async def bounce_rate(self, url, gr, start, end, md = False,
+                          columnar = False, as_frame = False):
+        return await self._call("bounce_rate", url, gr, start, end, md,
+                                columnar = columnar, as_frame = as_frame)
+
+
+class AsyncContentClient(_AsyncClient):
+    client_class = ContentClient
+
+    async def similar_sites(self, url, columnar = False, as_frame = False):
+        return await self._call("similar_sites", url,
+                                columnar = columnar, as_frame = as_frame)
+
+    async def also_visited(self, url, columnar = False, as_frame = False):
+        return await self._call("also_visited", url,
+                                columnar = columnar, as_frame = as_frame)
+
+    async def tags(self, url, columnar = False, as_frame = False):
+        return await self._call("tags", url,
+                                columnar = columnar, as_frame = as_frame)
+
+    async def category(self, url, as_frame = False):
+        return await self._call("category", url, as_frame = as_frame)
+
+    async def category_rank(self, url, as_frame = False):
+        return await self._call("category_rank", url, as_frame = as_frame)
+
+
+class AsyncSourcesClient(_AsyncClient):
+    client_class = SourcesClient
+
+    async def organic_search_keywords(self, url, page, start, end, md = False,
+                                      as_frame = False):
+        return await self._call("organic_search_keywords",
+                                url, page, start, end, md, as_frame = as_frame)
+
+    async def organic_keyword_competitors(self, url, page, start, end, md = False,
+                                          as_frame = False):
+        return await self._call("organic_keyword_competitors",
+                                url, page, start, end, md, as_frame = as_frame)
+
+    async def paid_keyword_competitors(self, url, page, start, end, md = False,
+                                       as_frame = False):
+        return await self._call("paid_keyword_competitors",
+                                url, page, start, end, md, as_frame = as_frame)
+
+    async def paid_search_keywords(self, url, page, start, end, md = False,
+                                   as_frame = False):
+        return await self._call("paid_search_keywords",
+                                url, page, start, end, md, as_frame = as_frame)
+
+    async def referrals(self, url, page, start, end, as_frame = False):
+        return await self._call("referrals", url, page, start, end,
+                                as_frame = as_frame)
+
+    async def social_referrals(self, url, as_frame = False):
+        return await self._call("social_referrals", url, as_frame = as_frame)
+
+    async def destinations(self, url, as_frame = False):
+        return await self._call("destinations", url, as_frame = as_frame)
+
+
+class AsyncMobileClient(_AsyncClient):
+    client_class = MobileClient
+
+    async def app_details(self, app_id, app_store, as_frame = False):
+        return await self._call("app_details", app_id, app_store,
+                                as_frame = as_frame)
+
+    async def google_app_installs(self, app_id, as_frame = False):
+        return await self._call("google_app_installs", app_id,
+                                as_frame = as_frame)
+
+    async def site_related_apps(self, app_id, app_store, columnar = False,
+                                as_frame = False):
+        return await self._call("site_related_apps", app_id, app_store,
+                                columnar = columnar, as_frame = as_frame)
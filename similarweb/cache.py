@@ -0,0 +1,181 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from . import helpers
+
+
+def _check_ttls(ttls):
+    ttls = dict(ttls or {})
+    unknown = sorted(set(ttls) - set(helpers.ENDPOINT_METHODS.values()))
+    if unknown:
+        raise ValueError("ttls keys must be client method names, e.g. "
+                         "'page_views'; unknown: {0}".format(", ".join(unknown)))
+    return ttls
+
+
+class MemoryCache(object):
+    """In-process LRU cache of parsed API responses.
+
+    Entries are keyed by `helpers.request_key`, so the same request made
+    with different API keys shares one entry. `ttl` is the lifetime in
+    seconds of an entry; `ttls` overrides it per endpoint, keyed by the
+    client method name, e.g. `{"page_views": 86400, "traffic": 600}`.
+    Once `max_size` entries are held the least recently used one is
+    evicted.
+    """
+
+    offline = False
+
+    def __init__(self, max_size = 1024, ttl = 3600, ttls = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.ttls = _check_ttls(ttls)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, url):
+        return self.ttls.get(helpers.endpoint_method(url), self.ttl)
+
+    def get(self, url):
+        key = helpers.request_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries[key] = self._entries.pop(key)
+            self.hits += 1
+            response = entry[1]
+        return copy.deepcopy(response)
+
+    def set(self, url, response):
+        key = helpers.request_key(url)
+        expires = time.time() + self.ttl_for(url)
+        response = copy.deepcopy(response)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, response)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last = False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries)}
+
+
+class SqliteCache(object):
+    """Durable response cache in a single SQLite file.
+
+    Any number of processes may share one file; WAL journaling lets
+    readers proceed while another process writes. Expiry works as in
+    `MemoryCache`. With `offline = True` clients never touch the
+    network: requests are answered from the file, expired entries
+    included, and misses come back as `helpers.BAD_OFFLINE_MISS`.
+    """
+
+    def __init__(self, path, ttl = 86400, ttls = None, offline = False,
+                 timeout = 30):
+        self.path = path
+        self.ttl = ttl
+        self.ttls = _check_ttls(ttls)
+        self.offline = offline
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connection().executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "  key TEXT PRIMARY KEY,"
+            "  endpoint TEXT NOT NULL,"
+            "  expires REAL NOT NULL,"
+            "  body TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS responses_expires"
+            "  ON responses (expires);")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout = self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def __len__(self):
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM responses").fetchone()
+        return row[0]
+
+    def ttl_for(self, url):
+        return self.ttls.get(helpers.endpoint_method(url), self.ttl)
+
+    def get(self, url):
+        row = self._connection().execute(
+            "SELECT expires, body FROM responses WHERE key = ?",
+            (helpers.request_key(url),)).fetchone()
+        fresh = row is not None and (self.offline or row[0] > time.time())
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if fresh:
+            import json
+            return json.loads(row[1])
+        return None
+
+    def set(self, url, response):
+        import json
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, expires, body)"
+                " VALUES (?, ?, ?, ?)",
+                (helpers.request_key(url), helpers.endpoint_method(url),
+                 time.time() + self.ttl_for(url), json.dumps(response)))
+
+    def purge_expired(self):
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM responses WHERE expires <= ?", (time.time(),))
+        return cursor.rowcount
+
+    def vacuum(self):
+        self.purge_expired()
+        self._connection().execute("VACUUM")
+
+    def clear(self):
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM responses")
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def stats(self):
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "size": len(self)}
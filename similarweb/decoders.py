@@ -0,0 +1,62 @@
+"""JSON decoders for API responses, chosen at runtime.
+
+Responses are parsed straight from the body bytes with the fastest
+library installed, in the order of `DECODERS`. Call `use(name)` to pick
+one explicitly. Every decoder raises ValueError on malformed input.
+"""
+import importlib
+import threading
+
+DECODERS = ("orjson", "ujson", "simplejson", "json")
+
+_loads = None
+_name = None
+_lock = threading.Lock()
+
+
+def load(name):
+    """Return `(name, loads)` for the named decoder; ImportError if missing."""
+    if name not in DECODERS:
+        raise ValueError("decoder must be one of {0}".format(", ".join(DECODERS)))
+    module = importlib.import_module(name)
+    if name == "json":
+        def loads(data):
+            # Older stdlib json only parses text
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            return module.loads(data)
+        return name, loads
+    return name, module.loads
+
+
+def available():
+    names = []
+    for name in DECODERS:
+        try:
+            importlib.import_module(name)
+        except (ImportError, SyntaxError):
+            continue
+        names.append(name)
+    return names
+
+
+def use(name):
+    global _loads, _name
+    with _lock:
+        _name, _loads = load(name)
+
+
+def current():
+    """Name of the decoder in use, choosing the best one on first call."""
+    global _loads, _name
+    if _loads is None:
+        with _lock:
+            if _loads is None:
+                _name, _loads = load(available()[0])
+    return _name
+
+
+def loads(data):
+    if _loads is None:
+        current()
+    return _loads(data)
@@ -0,0 +1,391 @@
+"""Writers that stream bulk client results to files.
+
+Results are flattened to rows by `kind`, which fixes the columns so
+every file of a kind has the same schema:
+
+* "time_series": visits, page_views, visit_duration, bounce_rate
+* "scores": similar_sites, also_visited, tags
+* "search_keywords": organic/paid search keyword pages and rows
+* "referrals": referral pages and rows
+* "keyword_competitors": organic/paid keyword competitor pages and rows
+
+Every row starts with the domain it belongs to. Results that are error
+dictionaries are not written; writers record them in `errors`.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+
+COLUMNS = {
+    "time_series": (("date", "date32"), ("value", "float64")),
+    "scores": (("key", "string"), ("score", "float64")),
+    "search_keywords": (("search_term", "string"), ("visits", "float64"),
+                        ("change", "float64")),
+    "referrals": (("site", "string"), ("visits", "float64"),
+                  ("change", "float64")),
+    "keyword_competitors": (("competitor", "string"), ("score", "float64")),
+}
+
+ROW_FIELDS = {
+    "search_keywords": ("SearchTerm", "Visits", "Change"),
+    "referrals": ("Site", "Visits", "Change"),
+    "keyword_competitors": ("Domain", "Score"),
+}
+
+
+def check_kind(kind):
+    if kind not in COLUMNS:
+        raise ValueError("kind must be one of {0}".format(", ".join(sorted(COLUMNS))))
+
+
+def column_names(kind):
+    check_kind(kind)
+    return ["domain"] + [name for name, _ in COLUMNS[kind]]
+
+
+def flatten(kind, result):
+    """Yield the value tuples of one result, without the domain."""
+    check_kind(kind)
+    if kind in ("time_series", "scores"):
+        for item in sorted(result.items()):
+            yield item
+        return
+
+    if isinstance(result, dict) and "Data" in result:
+        rows = result["Data"]
+    elif isinstance(result, dict):
+        rows = [result]
+    else:
+        rows = result
+    fields = ROW_FIELDS[kind]
+    for row in rows:
+        yield tuple(row.get(field) for field in fields)
+
+
+def is_error(result):
+    return isinstance(result, dict) and "Error" in result
+
+
+class _Batches(object):
+    """Collects flattened rows per column and cuts them into record batches."""
+
+    def __init__(self, kind):
+        import pyarrow
+
+        self._pyarrow = pyarrow
+        self.schema = pyarrow.schema(
+            [("domain", pyarrow.string())] +
+            [(name, getattr(pyarrow, type_name)()) for name, type_name in COLUMNS[kind]])
+        self._columns = [[] for _ in self.schema]
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def append(self, domain, values):
+        self._columns[0].append(domain)
+        for column, value in zip(self._columns[1:], values):
+            column.append(value)
+
+    def take(self):
+        """Return the collected rows as one record batch and start afresh."""
+        pyarrow = self._pyarrow
+        arrays = []
+        for column, field in zip(self._columns, self.schema):
+            if field.type == pyarrow.date32():
+                import numpy
+                column = numpy.array(column, dtype = "datetime64[D]")
+            arrays.append(pyarrow.array(column, type = field.type))
+        self._columns = [[] for _ in self.schema]
+        return pyarrow.RecordBatch.from_arrays(arrays, schema = self.schema)
+
+
+class ParquetSink(object):
+    """Streams results into a Parquet file, one row group at a time.
+
+    Rows are buffered per column and written as an Arrow record batch
+    every `row_group_size` rows, so memory stays flat however many
+    results pass through. pyarrow is imported on first use.
+    """
+
+    def __init__(self, path, kind, row_group_size = 65536,
+                 compression = "snappy"):
+        check_kind(kind)
+        import pyarrow.parquet
+
+        self.path = path
+        self.kind = kind
+        self.row_group_size = row_group_size
+        self._batches = _Batches(kind)
+        self.schema = self._batches.schema
+        self.rows_written = 0
+        self.errors = []
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema,
+                                                     compression = compression)
+
+    def write(self, domain, result):
+        if is_error(result):
+            self.errors.append((domain, result))
+            return
+        for values in flatten(self.kind, result):
+            self._batches.append(domain, values)
+            if len(self._batches) >= self.row_group_size:
+                self.flush()
+
+    def write_many(self, results):
+        """Write every `(domain, result)` pair, e.g. from a `_many` call."""
+        for domain, result in results:
+            self.write(domain, result)
+
+    def flush(self):
+        if not len(self._batches):
+            return
+        batch = self._batches.take()
+        self._writer.write_batch(batch)
+        self.rows_written += batch.num_rows
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _TextSink(object):
+    """Buffered, optionally compressed, resumable writer of text rows.
+
+    Encoded rows collect in memory until `buffer_size` bytes are pending
+    and are then written in one call. With a `checkpoint` file the sink
+    records, every `checkpoint_every` domains, the finished domains and
+    the output offset they end at; compressed streams end a gzip member
+    or zstd frame there, so the file is valid up to every checkpoint.
+    Reopening with `resume = True` truncates the output back to the last
+    checkpoint and skips the domains it lists.
+
+    A domain counts as finished once a different domain is written, so
+    rows of one paginated result may be passed one `write` at a time.
+    Its rows are held back until then: a domain that reports an error
+    part way through leaves nothing in the file, later rows for it are
+    dropped as well, and it is never recorded as finished, so resuming
+    writes it once.
+    """
+
+    def __init__(self, path, kind, encode, compression = None, checkpoint = None,
+                 checkpoint_every = 1000, resume = False,
+                 buffer_size = 1 << 20):
+        check_kind(kind)
+        if compression not in (None, "gzip", "zstd"):
+            raise ValueError('compression must be None, "gzip" or "zstd"')
+        self.path = path
+        self.kind = kind
+        self.columns = column_names(kind)
+        self._encode = encode
+        self.compression = compression
+        self.checkpoint_path = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.buffer_size = buffer_size
+        self.rows_written = 0
+        self.errors = []
+        self.done = set()
+        self._failed = set()
+        self._finished = []
+        self._current = None
+        self._rows = []
+        self._pending = []
+        self._pending_size = 0
+
+        offset = 0
+        if resume and checkpoint is not None and os.path.exists(checkpoint):
+            offset = self._load_checkpoint()
+        if offset:
+            self._raw = open(path, "r+b")
+            self._raw.truncate(offset)
+            self._raw.seek(offset)
+        else:
+            self._raw = open(path, "wb")
+            if checkpoint is not None:
+                open(checkpoint, "w").close()
+        self._stream = self._open_stream()
+        if not offset:
+            self._start()
+
+    def _load_checkpoint(self):
+        offset = 0
+        with open(self.checkpoint_path) as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # a record cut short by the interruption
+                offset = entry["offset"]
+                self.done.update(entry["domains"])
+        return offset
+
+    def _open_stream(self):
+        if self.compression == "gzip":
+            return gzip.GzipFile(fileobj = self._raw, mode = "wb")
+        if self.compression == "zstd":
+            import zstandard
+            return zstandard.ZstdCompressor().stream_writer(self._raw, closefd = False)
+        return self._raw
+
+    def _end_stream(self):
+        """End the compressed member or frame; return the offset it ends at."""
+        if self.compression == "gzip":
+            self._stream.close()
+            self._raw.flush()
+            offset = self._raw.tell()
+            self._stream = self._open_stream()
+            return offset
+        if self.compression == "zstd":
+            import zstandard
+            self._stream.flush(zstandard.FLUSH_FRAME)
+        self._raw.flush()
+        return self._raw.tell()
+
+    def _start(self):
+        """Write whatever begins a fresh file, such as a header."""
+
+    def write(self, domain, result):
+        if domain in self.done:
+            return
+        if is_error(result):
+            self.errors.append((domain, result))
+            self._failed.add(domain)
+            if domain == self._current:
+                self._current = None  # incomplete, so dropped and never checkpointed
+                self._rows = []
+            return
+        if domain in self._failed:
+            return
+        if domain != self._current:
+            self._finish_current()
+            self._current = domain
+        for values in flatten(self.kind, result):
+            self._rows.append(self._encode((domain,) + tuple(values)))
+
+    def write_many(self, results):
+        """Write every `(domain, result)` pair, e.g. from a `_many` call."""
+        for domain, result in results:
+            self.write(domain, result)
+
+    def _append(self, data):
+        self._pending.append(data)
+        self._pending_size += len(data)
+        if self._pending_size >= self.buffer_size:
+            self.flush()
+
+    def _finish_current(self):
+        if self._current is None:
+            return
+        for data in self._rows:
+            self._append(data)
+        self.rows_written += len(self._rows)
+        self._rows = []
+        self._finished.append(self._current)
+        self._current = None
+        if self.checkpoint_path is not None and len(self._finished) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def flush(self):
+        if self._pending:
+            self._stream.write(b"".join(self._pending))
+            self._pending = []
+            self._pending_size = 0
+
+    def checkpoint(self):
+        """Make every finished domain durable and record it."""
+        self.flush()
+        self._record(self._end_stream())
+
+    def _record(self, offset):
+        if self.checkpoint_path is None or not self._finished:
+            return
+        os.fsync(self._raw.fileno())
+        entry = {"offset": offset, "domains": self._finished}
+        with open(self.checkpoint_path, "a") as checkpoint_file:
+            checkpoint_file.write(json.dumps(entry) + "\n")
+        self.done.update(self._finished)
+        self._finished = []
+
+    def close(self):
+        self._finish_current()
+        self.flush()
+        if self._stream is not self._raw:
+            self._stream.close()
+        self._raw.flush()
+        self._record(self._raw.tell())
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _csv_encoder():
+    text = io.StringIO()
+    writer = csv.writer(text, lineterminator = "\n")
+
+    def encode(row):
+        writer.writerow(row)
+        line = text.getvalue()
+        text.seek(0)
+        text.truncate()
+        return line.encode("utf-8")
+    return encode
+
+
+def _jsonl_encoder(columns):
+    def encode(row):
+        return (json.dumps(dict(zip(columns, row)), separators = (",", ":"),
+                           sort_keys = True) + "\n").encode("utf-8")
+    return encode
+
+
+class CsvSink(_TextSink):
+    """Streams results into a CSV file with a header row."""
+
+    def __init__(self, path, kind, **options):
+        super(CsvSink, self).__init__(path, kind, _csv_encoder(), **options)
+
+    def _start(self):
+        self._append(self._encode(self.columns))
+
+
+class JsonlSink(_TextSink):
+    """Streams results into a JSON Lines file, one object per row."""
+
+    def __init__(self, path, kind, **options):
+        super(JsonlSink, self).__init__(path, kind, _jsonl_encoder(column_names(kind)),
+                                        **options)
+
+
+def to_arrow(kind, results, batch_size = 65536):
+    """Build one Arrow table from `(domain, result)` pairs held in memory.
+
+    Rows are gathered into record batches of `batch_size` rows and the
+    table is assembled from them directly; error results are skipped.
+    """
+    check_kind(kind)
+    import pyarrow
+
+    batches = _Batches(kind)
+    taken = []
+    for domain, result in results:
+        if is_error(result):
+            continue
+        for values in flatten(kind, result):
+            batches.append(domain, values)
+            if len(batches) >= batch_size:
+                taken.append(batches.take())
+    if len(batches):
+        taken.append(batches.take())
+    return pyarrow.Table.from_batches(taken, schema = batches.schema)
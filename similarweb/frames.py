@@ -0,0 +1,52 @@
+"""pandas DataFrame builders for the `as_frame = True` client results.
+
+Each builder takes the parsed API response and fills the frame straight
+from it, rather than going through the dictionaries the clients return
+by default. pandas is imported on first use so the base install does not
+need it.
+"""
+
+
+def _pandas():
+    import pandas
+    return pandas
+
+
+def time_series(items, column = "Value"):
+    """One float64 column on a DatetimeIndex named Date."""
+    pandas = _pandas()
+    from . import helpers
+    dates, values = helpers.columnar(items, "Date", "Value",
+                                     keys_dtype = "datetime64[D]")
+    return pandas.DataFrame({column: values},
+                            index = pandas.DatetimeIndex(dates, name = "Date"))
+
+
+def records(items, columns):
+    return _pandas().DataFrame.from_records(items, columns = columns)
+
+
+def single_row(response):
+    return _pandas().DataFrame([response])
+
+
+def strings(items, column):
+    return _pandas().DataFrame({column: _pandas().Series(items, dtype = object)})
+
+
+def traffic(response):
+    """The traffic overview with its three lists as frames.
+
+    TrafficReach dates come as DD/MM/YYYY and become a DatetimeIndex.
+    """
+    pandas = _pandas()
+    reach = records(response["TrafficReach"], ["Date", "Value"])
+    reach.index = pandas.DatetimeIndex(
+        pandas.to_datetime(reach.pop("Date"), format = "%d/%m/%Y"), name = "Date")
+    result = dict(response)
+    result["TopCountryShares"] = records(response["TopCountryShares"],
+                                         ["CountryCode", "TrafficShare"])
+    result["TrafficReach"] = reach
+    result["TrafficShares"] = records(response["TrafficShares"],
+                                      ["SourceType", "SourceValue"])
+    return result
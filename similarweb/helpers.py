@@ -1,23 +1,319 @@
-import requests
-try:
-    import simplejson as json
-except (ImportError, SyntaxError):
-    import json
+import re
+import time
+from collections import deque
+from urllib.parse import urlsplit, parse_qsl, urlencode, quote
+
+from . import decoders
+from . import streaming
+from .transport import Transport, default_transport
 
 BAD_API_KEY = {"Error": "user_key_invalid"}
 BAD_URL = {"Error": "Malformed or Unknown URL"}
 BAD_DATE_ORDER = {"Error": "Date range is not valid"}
 BAD_UNKNOWN_ERROR = {"Error": "Unknown Error"}
 BAD_APP_STORE = {"Error": "App store must be 'apple' or 'google'"}
+BAD_OFFLINE_MISS = {"Error": "Not available in offline cache"}
+BAD_METRIC = {"Error": "Metric must be 'visits', 'page_views', "
+                       "'visit_duration' or 'bounce_rate'"}
+BAD_SHARD_SIZE = {"Error": "months_per_shard must be at least 1"}
+BAD_QUOTA_EXCEEDED = {"Error": "Client-side quota for this API key is spent"}
+BAD_TRANSPORT = {"Error": "API unreachable or unavailable, retries exhausted"}
+BAD_THROTTLED = {"Error": "Throttled by the API, retries exhausted"}
+
+TIME_SERIES_METRICS = ("visits", "page_views", "visit_duration", "bounce_rate")
+
+# Outcomes produced on our side of the wire, returned to callers as-is
+REQUEST_FAILURES = [BAD_OFFLINE_MISS, BAD_QUOTA_EXCEEDED,
+                    BAD_TRANSPORT, BAD_THROTTLED]
+
+# Outcomes worth asking the API for again
+RETRYABLE_FAILURES = [BAD_UNKNOWN_ERROR, BAD_TRANSPORT, BAD_THROTTLED]
+
+def get_http_response(url, transport = None, retry_throttled = True):
+    return decode_http_response(send_http_request(
+        url, transport, retry_throttled = retry_throttled))
 
-def get_http_response(url):
+
+def send_http_request(url, transport = None, stream = False,
+                      retry_throttled = True):
+    """Return the HTTP response for `url`, or BAD_TRANSPORT.
+
+    With `stream` it returns once the headers arrive, before the body.
+    With `retry_throttled` False a `Transport` returns a 429 instead of
+    retrying it; other transports are called as before.
+    """
+    import requests
+
+    if transport is None:
+        transport = default_transport()
+    options = {}
+    if stream:
+        options["stream"] = True
+    if not retry_throttled and isinstance(transport, Transport):
+        options["retry_throttled"] = False
     try:
-        response = requests.get(url)
-        return json.loads(response.text)
+        return transport.get(url, **options)
+    except requests.RequestException:
+        return BAD_TRANSPORT
+
+
+def decode_http_response(response):
+    """Turn an HTTP response from send_http_request into a dictionary."""
+    if is_request_failure(response):
+        return response
+
+    # Transient statuses the transport already retried; real API error
+    # payloads come back with 4xx statuses and are classified by clients
+    if response.status_code == 429:
+        return BAD_THROTTLED
+    if response.status_code >= 500:
+        return BAD_TRANSPORT
+
+    try:
+        return decoders.loads(response.content)
     except ValueError:
         return BAD_URL
 
 
+def iter_http_rows(url, key, transport = None, chunk_size = 16384,
+                   progress = None):
+    """Stream the rows of the top-level `key` array of a response.
+
+    Raises streaming.NotAPage carrying the parsed body, or one of the
+    request failures, when the response turns out not to be a page. A
+    failure after some rows have been yielded, including a body that
+    ends early, is raised the same way. A `progress` dictionary gets the
+    response under "response" and the time its headers arrived under
+    "received", and counts the body bytes read so far under "size".
+    """
+    import requests
+
+    if transport is None:
+        transport = default_transport()
+    try:
+        response = transport.get(url, stream = True)
+    except requests.RequestException:
+        raise streaming.NotAPage(BAD_TRANSPORT)
+
+    chunks = response.iter_content(chunk_size)
+    if progress is not None:
+        progress.update(response = response, received = time.time(), size = 0)
+        chunks = _counted(chunks, progress)
+    try:
+        if response.status_code == 429:
+            raise streaming.NotAPage(BAD_THROTTLED)
+        if response.status_code >= 500:
+            raise streaming.NotAPage(BAD_TRANSPORT)
+        for row in streaming.iter_rows(chunks, key):
+            yield row
+    except (requests.RequestException, streaming.Truncated):
+        raise streaming.NotAPage(BAD_TRANSPORT)
+    except streaming.NotAPage as e:
+        if e.response is None:
+            raise streaming.NotAPage(BAD_URL)
+        raise
+    finally:
+        response.close()
+
+
+def _counted(chunks, progress):
+    for chunk in chunks:
+        progress["size"] += len(chunk)
+        yield chunk
+
+
+# The client method requesting each endpoint, by the endpoint's URL name
+ENDPOINT_METHODS = {
+    "traffic": "traffic",
+    "visits": "visits",
+    "pageviews": "page_views",
+    "visitduration": "visit_duration",
+    "bouncerate": "bounce_rate",
+    "similarsites": "similar_sites",
+    "alsovisited": "also_visited",
+    "tags": "tags",
+    "category": "category",
+    "categoryrank": "category_rank",
+    "orgsearch": "organic_search_keywords",
+    "orgkwcompetitor": "organic_keyword_competitors",
+    "paidkwcompetitor": "paid_keyword_competitors",
+    "paidsearch": "paid_search_keywords",
+    "referrals": "referrals",
+    "socialreferringsites": "social_referrals",
+    "leadingdestinationsites": "destinations",
+    "getappdetails": "app_details",
+    "getappinstalls": "google_app_installs",
+    "getrelatedsiteapps": "site_related_apps",
+}
+
+
+def endpoint_name(url):
+    path = urlsplit(url).path
+    return path.rstrip("/").rsplit("/", 1)[-1].lower()
+
+
+def endpoint_method(url):
+    """The client method requesting `url`, e.g. "page_views"."""
+    name = endpoint_name(url)
+    return ENDPOINT_METHODS.get(name, name)
+
+
+def request_key(url):
+    """Normalize a request URL into a key that ignores the API key.
+
+    The scheme and host are kept, so a stub server and the production
+    API never share entries. Query parameters are sorted so equivalent
+    requests share a key, and `UserKey` is dropped so it never ends up
+    in a cache or a log.
+    """
+    parts = urlsplit(url)
+    params = sorted((k.lower(), v) for k, v in parse_qsl(parts.query)
+                    if k.lower() != "userkey")
+    return "{0}://{1}{2}?{3}".format(parts.scheme.lower(), parts.netloc.lower(),
+                                     parts.path.lower(), urlencode(params))
+
+
+def is_request_failure(response):
+    return response in REQUEST_FAILURES
+
+
+def is_invalid_key_response(response):
+    return ("Error" in response and not is_request_failure(response) and
+            response != BAD_URL)
+
+
+def with_user_key(url, user_key):
+    return re.sub(r"UserKey=[^&]*", "UserKey=" + quote(str(user_key), safe = ""),
+                  url)
+
+
+def is_cacheable(response):
+    return "Error" not in response and "Message" not in response
+
+
+def fan_out(method, items, args = (), max_workers = 16):
+    """Call `method(item, *args)` for every item on a thread pool.
+
+    Yields `(item, result)` pairs in completion order. Items are taken
+    from `items` only as workers free up, so at most `max_workers` calls
+    are pending at a time however many items there are. A call that
+    raises yields BAD_UNKNOWN_ERROR for its item rather than aborting
+    the batch.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    items = iter(items)
+    executor = ThreadPoolExecutor(max_workers = max_workers)
+    pending = {}
+    try:
+        for item in items:
+            pending[executor.submit(method, item, *args)] = item
+            if len(pending) == max_workers:
+                break
+        while pending:
+            done = wait(pending, return_when = FIRST_COMPLETED)[0]
+            for future in done:
+                item = pending.pop(future)
+                for next_item in items:
+                    pending[executor.submit(method, next_item, *args)] = next_item
+                    break
+                try:
+                    result = future.result()
+                except Exception:
+                    result = BAD_UNKNOWN_ERROR
+                yield item, result
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait = False)
+
+
+def page_count(response):
+    per_page = response.get("ResultsCount") or len(response["Data"])
+    total = response.get("TotalCount") or 0
+    if not per_page:
+        return 1
+    return max(1, (total + per_page - 1) // per_page)
+
+
+def iter_pages(method, args = (), window = 4):
+    """Yield the `Data` rows of every page of a paginated endpoint.
+
+    `method(page, *args)` fetches one page. Page 1 is fetched first to
+    learn `TotalCount`; the remaining pages are then fetched up to
+    `window` at a time while rows are yielded in page order. A page that
+    fails is yielded as its error dictionary in place of its rows.
+    """
+    first = method(1, *args)
+    if "Data" not in first:
+        yield first
+        return
+    for row in first["Data"]:
+        yield row
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    pages = iter(range(2, page_count(first) + 1))
+    executor = ThreadPoolExecutor(max_workers = window)
+    pending = deque()
+    try:
+        for page in pages:
+            pending.append(executor.submit(method, page, *args))
+            if len(pending) == window:
+                break
+        while pending:
+            response = pending.popleft().result()
+            for page in pages:
+                pending.append(executor.submit(method, page, *args))
+                break
+            if "Data" not in response:
+                yield response
+                continue
+            for row in response["Data"]:
+                yield row
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait = False)
+
+
+def parse_month(string):
+    month, year = string.strip().split("-")
+    return int(year), int(month)
+
+
+def format_month(year, month):
+    return "{0}-{1}".format(month, year)
+
+
+def month_shards(start, end, months_per_shard):
+    """Split an M-YYYY `start`..`end` range into consecutive sub-ranges.
+
+    Ranges that cannot be parsed or are out of order come back whole so
+    the API can report the problem. `months_per_shard` must be at
+    least 1.
+    """
+    if months_per_shard < 1:
+        raise ValueError("months_per_shard must be at least 1")
+    try:
+        first = parse_month(start)
+        last = parse_month(end)
+    except ValueError:
+        return [(start, end)]
+    if first > last:
+        return [(start, end)]
+
+    shards = []
+    index = first[0] * 12 + first[1] - 1
+    last_index = last[0] * 12 + last[1] - 1
+    while index <= last_index:
+        shard_end = min(index + months_per_shard - 1, last_index)
+        shards.append((format_month(index // 12, index % 12 + 1),
+                       format_month(shard_end // 12, shard_end % 12 + 1)))
+        index = shard_end + 1
+    return shards
+
+
 def dictify(list_of_dicts, to_be_keys, to_be_values, stringify_keys = False):
     values = [d[to_be_values] for d in list_of_dicts]
     if stringify_keys:
@@ -27,6 +323,23 @@ def dictify(list_of_dicts, to_be_keys, to_be_values, stringify_keys = False):
     return dict(zip(keys, values))
 
 
+def columnar(list_of_dicts, to_be_keys, to_be_values,
+             keys_dtype = "object", values_dtype = "float64"):
+    """Like dictify, but as a pair of parallel NumPy arrays.
+
+    Each column is converted straight from the parsed items, skipping the
+    dict. Time series use `keys_dtype = "datetime64[D]"`. NumPy is
+    imported on first use.
+    """
+    import numpy
+
+    keys = numpy.array([d[to_be_keys] for d in list_of_dicts],
+                       dtype = keys_dtype)
+    values = numpy.array([d[to_be_values] for d in list_of_dicts],
+                         dtype = values_dtype)
+    return keys, values
+
+
 def bad_inputs_to_traffic_or_sources_api(dictionary):
     sub = dictionary["ModelState"]
     error_message = list(sub.values())[0][0]
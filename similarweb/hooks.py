@@ -0,0 +1,146 @@
+import time
+from urllib.parse import urlsplit, parse_qsl
+
+
+class Call(object):
+    """One endpoint call, as seen by hooks and tracing spans.
+
+    `domain` is the site or app id requested; `gr` and `page` are None
+    for endpoints without them. `timings` holds the seconds spent in
+    each phase of the last round trip: "ttfb" from sending the request
+    to its response headers (including connecting, and any retries),
+    "download" reading the body, "decode" parsing it, and "classify"
+    turning it into the result. A call answered by the cache or by a
+    coalesced request has `cached` or no round-trip timings.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.url = None
+        self.domain = None
+        self.gr = None
+        self.page = None
+        self.status = None
+        self.attempts = 0
+        self.size = 0
+        self.cached = False
+        self.timings = {}
+        self.result = None
+        self.exception = None
+        self._received = None
+
+    def request(self, url):
+        self.url = url
+        parts = urlsplit(url)
+        segments = parts.path.strip("/").split("/")
+        for i, segment in enumerate(segments[:-1]):
+            if segment == "Site":
+                self.domain = segments[i + 1]
+                break
+            if segment == "Mobile" and i + 2 < len(segments):
+                self.domain = segments[i + 2]
+                break
+        query = dict(parse_qsl(parts.query))
+        self.gr = query.get("gr")
+        self.page = int(query["page"]) if query.get("page", "").isdigit() else None
+
+    @property
+    def failed(self):
+        return self.exception is not None or (
+            isinstance(self.result, dict) and "Error" in self.result)
+
+
+class _NoSpan(object):
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class Hooks(object):
+    """Callbacks run around the requests of the clients that share it.
+
+    Every callback receives the `Call`. `before_request` callbacks run
+    before each round trip and `after_response` callbacks once it is
+    decoded; a call served from the cache makes no round trip. `on_error`
+    callbacks run when a call returns an error dictionary or raises.
+    With a `tracer` (an OpenTelemetry tracer, or anything with a
+    `start_as_current_span(name)` context manager) each call is a span
+    named "similarweb.<endpoint>" carrying the call's attributes.
+    """
+
+    def __init__(self, before_request = (), after_response = (), on_error = (),
+                 tracer = None):
+        self.before_request = list(before_request)
+        self.after_response = list(after_response)
+        self.on_error = list(on_error)
+        self.tracer = tracer
+
+    def run(self, call, fn):
+        """Run `fn` as the endpoint call `call`; return its result."""
+        with self.span(call) as span:
+            try:
+                call.result = fn()
+            except Exception as e:
+                self.raised(call, span, e)
+                raise
+            self.returned(call, span)
+        return call.result
+
+    def span(self, call):
+        """The tracing span of `call`; None is entered without a tracer."""
+        if self.tracer is None:
+            return _NoSpan()
+        return self.tracer.start_as_current_span("similarweb." + call.endpoint)
+
+    def returned(self, call, span):
+        if call._received is not None:
+            call.timings["classify"] = time.time() - call._received
+        if call.failed:
+            self._emit(self.on_error, call)
+        if span is not None:
+            _annotate(span, call)
+
+    def raised(self, call, span, exception):
+        call.exception = exception
+        self._emit(self.on_error, call)
+        if span is not None:
+            _annotate(span, call)
+
+    def requesting(self, call, url):
+        call.request(url)
+        self._emit(self.before_request, call)
+
+    def responded(self, call, response, timings, size = None):
+        """Record the round trip; `size` is the body length when streamed."""
+        if hasattr(response, "status_code"):
+            call.status = response.status_code
+            call.attempts = getattr(response, "attempts", 1)
+            call.size = len(response.content) if size is None else size
+        call.timings.update(timings)
+        call._received = time.time()
+        self._emit(self.after_response, call)
+
+    def _emit(self, callbacks, call):
+        for callback in callbacks:
+            callback(call)
+
+
+def _annotate(span, call):
+    attributes = {"similarweb.endpoint": call.endpoint,
+                  "similarweb.domain": call.domain,
+                  "similarweb.gr": call.gr,
+                  "similarweb.page": call.page,
+                  "similarweb.cached": call.cached,
+                  "similarweb.retries": max(0, call.attempts - 1),
+                  "http.status_code": call.status}
+    for phase, seconds in call.timings.items():
+        attributes["similarweb.phase." + phase] = seconds
+    if call.failed:
+        attributes["error"] = True
+        if call.exception is None:
+            attributes["similarweb.error"] = str(call.result["Error"])
+    for name, value in attributes.items():
+        if value is not None:
+            span.set_attribute(name, value)
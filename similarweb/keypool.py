@@ -0,0 +1,94 @@
+import threading
+import time
+
+from . import helpers
+
+
+class KeyPool(object):
+    """Several API keys used by one client in rotation.
+
+    Pass a KeyPool as a client's `user_key`. Each request is sent with
+    the next key by `strategy`, either "round_robin" or "least_used".
+    A key answered with an invalid-key error, or whose client-side quota
+    is spent, leaves the rotation for good; a throttled key sits out for
+    `cooldown` seconds. The request is then re-sent with another key.
+    """
+
+    def __init__(self, keys, strategy = "round_robin", cooldown = 60):
+        if strategy not in ("round_robin", "least_used"):
+            raise ValueError("strategy must be 'round_robin' or 'least_used'")
+        self.keys = list(keys)
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self._requests = dict((key, 0) for key in self.keys)
+        self._errors = dict((key, 0) for key in self.keys)
+        self._disabled = {}
+        self._resting_until = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        # Stands in for the key while a client builds its URL; the key
+        # actually sent is substituted per request
+        return "pooled"
+
+    def _active(self):
+        now = time.time()
+        return [key for key in self.keys
+                if key not in self._disabled and
+                self._resting_until.get(key, 0) <= now]
+
+    def acquire(self):
+        """The key to send the next request with, or None if none is usable."""
+        with self._lock:
+            active = self._active()
+            if not active:
+                return None
+            if self.strategy == "least_used":
+                key = min(active, key = lambda k: self._requests[k])
+            else:
+                key = active[self._next % len(active)]
+                self._next += 1
+            self._requests[key] += 1
+            return key
+
+    def record(self, key, response):
+        """Note the raw response to a request; True if `key` was rotated out."""
+        with self._lock:
+            if response == helpers.BAD_THROTTLED:
+                self._errors[key] += 1
+                self._resting_until[key] = time.time() + self.cooldown
+                return True
+            if response == helpers.BAD_QUOTA_EXCEEDED:
+                self._disabled[key] = "quota"
+                return True
+            if helpers.is_invalid_key_response(response):
+                self._errors[key] += 1
+                self._disabled[key] = "invalid"
+                return True
+            return False
+
+    def exhausted(self):
+        """The outcome to report when no key is usable."""
+        with self._lock:
+            if len(self._disabled) == len(self.keys):
+                if "quota" in self._disabled.values():
+                    return helpers.BAD_QUOTA_EXCEEDED
+                return helpers.BAD_API_KEY
+            return helpers.BAD_THROTTLED
+
+    def usage(self):
+        with self._lock:
+            now = time.time()
+            report = {}
+            for key in self.keys:
+                if key in self._disabled:
+                    status = self._disabled[key]
+                elif self._resting_until.get(key, 0) > now:
+                    status = "throttled"
+                else:
+                    status = "active"
+                report[key] = {"requests": self._requests[key],
+                               "errors": self._errors[key],
+                               "status": status}
+            return report
@@ -0,0 +1,131 @@
+import threading
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+HELP = (
+    ("requests_total", "counter", "Requests sent to the API."),
+    ("request_duration_seconds", "histogram",
+     "Time from sending a request to decoding its response."),
+    ("response_bytes_total", "counter", "Response body bytes received."),
+    ("cache_hits_total", "counter", "Requests answered by the response cache."),
+    ("outcomes_total", "counter", "Results returned to callers, by outcome."),
+)
+
+
+class _Endpoint(object):
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.bytes = 0
+        self.latency_sum = 0.0
+        self.latency_counts = [0] * (len(BUCKETS) + 1)
+        self.outcomes = {}
+
+
+class Metrics(object):
+    """Per-endpoint request metrics, shared by any number of clients.
+
+    Clients given `metrics` count their requests, round-trip latency,
+    response bytes, cache hits and the outcome of every call: "ok" or
+    the message of the error dictionary returned. `stats` takes a
+    snapshot; `prometheus` renders the Prometheus text format. Clients
+    without metrics skip all of this.
+    """
+
+    def __init__(self, namespace = "similarweb"):
+        self.namespace = namespace
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, endpoint):
+        entry = self._endpoints.get(endpoint)
+        if entry is None:
+            entry = self._endpoints.setdefault(endpoint, _Endpoint())
+        return entry
+
+    def request(self, endpoint, seconds, size):
+        bucket = 0
+        while bucket < len(BUCKETS) and seconds > BUCKETS[bucket]:
+            bucket += 1
+        with self._lock:
+            entry = self._endpoint(endpoint)
+            entry.requests += 1
+            entry.bytes += size
+            entry.latency_sum += seconds
+            entry.latency_counts[bucket] += 1
+
+    def cache_hit(self, endpoint):
+        with self._lock:
+            self._endpoint(endpoint).cache_hits += 1
+
+    def outcome(self, endpoint, result):
+        if isinstance(result, dict) and "Error" in result:
+            outcome = str(result["Error"])
+        else:
+            outcome = "ok"
+        with self._lock:
+            outcomes = self._endpoint(endpoint).outcomes
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    def stats(self):
+        """Counters per endpoint; latency buckets are cumulative."""
+        with self._lock:
+            snapshot = {}
+            for endpoint, entry in self._endpoints.items():
+                cumulative, total = {}, 0
+                for bound, count in zip(BUCKETS + ("+Inf",), entry.latency_counts):
+                    total += count
+                    cumulative[str(bound)] = total
+                snapshot[endpoint] = {
+                    "requests": entry.requests,
+                    "cache_hits": entry.cache_hits,
+                    "bytes": entry.bytes,
+                    "latency": {"count": entry.requests,
+                                "sum": entry.latency_sum,
+                                "buckets": cumulative},
+                    "outcomes": dict(entry.outcomes),
+                }
+            return snapshot
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        stats = self.stats()
+        lines = []
+        for name, kind, description in HELP:
+            metric = "{0}_{1}".format(self.namespace, name)
+            lines.append("# HELP {0} {1}".format(metric, description))
+            lines.append("# TYPE {0} {1}".format(metric, kind))
+            for endpoint in sorted(stats):
+                entry = stats[endpoint]
+                labels = 'endpoint="{0}"'.format(_escape(endpoint))
+                if name == "requests_total":
+                    lines.append(_sample(metric, labels, entry["requests"]))
+                elif name == "response_bytes_total":
+                    lines.append(_sample(metric, labels, entry["bytes"]))
+                elif name == "cache_hits_total":
+                    lines.append(_sample(metric, labels, entry["cache_hits"]))
+                elif name == "outcomes_total":
+                    for outcome, count in sorted(entry["outcomes"].items()):
+                        lines.append(_sample(metric, '{0},outcome="{1}"'.format(
+                            labels, _escape(outcome)), count))
+                else:
+                    latency = entry["latency"]
+                    for bound in BUCKETS + ("+Inf",):
+                        lines.append(_sample(metric + "_bucket", '{0},le="{1}"'.format(
+                            labels, bound), latency["buckets"][str(bound)]))
+                    lines.append(_sample(metric + "_sum", labels, latency["sum"]))
+                    lines.append(_sample(metric + "_count", labels, latency["count"]))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample(metric, labels, value):
+    return "{0}{{{1}}} {2}".format(metric, labels, value)
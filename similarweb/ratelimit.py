@@ -0,0 +1,118 @@
+import threading
+import time
+
+
+class TokenBucket(object):
+    """Allows `rate` acquisitions per second with bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token; return the seconds to wait before using it.
+
+        Callers that find the bucket empty reserve a future token, so
+        waiting callers are served in arrival order.
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def acquire(self):
+        """Take a token, sleeping until one is available."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class QuotaLedger(object):
+    """Counts the API credits spent per user key and endpoint.
+
+    With a `limit`, each user key may spend at most that many credits;
+    `charge` refuses once it is reached.
+    """
+
+    def __init__(self, limit = None):
+        self.limit = limit
+        self._spent = {}
+        self._lock = threading.Lock()
+
+    def charge(self, user_key, endpoint, credits = 1):
+        with self._lock:
+            if self.limit is not None and self._total(user_key) + credits > self.limit:
+                return False
+            key = (user_key, endpoint)
+            self._spent[key] = self._spent.get(key, 0) + credits
+            return True
+
+    def _total(self, user_key):
+        return sum(n for (k, _), n in self._spent.items() if k == user_key)
+
+    def total(self, user_key):
+        with self._lock:
+            return self._total(user_key)
+
+    def remaining(self, user_key):
+        if self.limit is None:
+            return None
+        return max(0, self.limit - self.total(user_key))
+
+    def usage(self, user_key):
+        with self._lock:
+            return dict((endpoint, n) for (k, endpoint), n in self._spent.items()
+                        if k == user_key)
+
+    def reset(self):
+        with self._lock:
+            self._spent.clear()
+
+
+class RateLimiter(object):
+    """Client-side throttle shared by any number of clients and threads.
+
+    Each user key gets its own token bucket allowing `rate` requests per
+    second with bursts of `burst`, and spends credits from one shared
+    `QuotaLedger` capped at `quota` per key. Pass the same RateLimiter to
+    every client that uses a key.
+    """
+
+    def __init__(self, rate = 10, burst = 10, quota = None):
+        self.rate = rate
+        self.burst = burst
+        self.ledger = QuotaLedger(quota)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, user_key):
+        with self._lock:
+            bucket = self._buckets.get(user_key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[user_key] = bucket
+            return bucket
+
+    def acquire(self, user_key, endpoint):
+        """Wait for a request slot; False if the quota is spent."""
+        if not self.ledger.charge(user_key, endpoint):
+            return False
+        self.bucket(user_key).acquire()
+        return True
+
+    def reserve(self, user_key, endpoint):
+        """Book a request slot without waiting for it.
+
+        Returns the seconds to wait before sending, or None if the quota
+        is spent. Event loops use this in place of `acquire`.
+        """
+        if not self.ledger.charge(user_key, endpoint):
+            return None
+        return self.bucket(user_key).reserve()
@@ -1,19 +1,330 @@
-from . import helpers
-
+import os
+import threading
+import time
+from functools import partial, wraps
 
-class TrafficClient(object):
-    def __init__(self, user_key):
+from . import frames
+from . import helpers
+from . import hooks
+from . import singleflight
+from . import streaming
+from .keypool import KeyPool
+
+API_ROOT = "https://api.similarweb.com"
+
+
+class _Request(object):
+    """The request an endpoint call makes.
+
+    `classify` turns the decoded response into the call's result; `rows`
+    names the array to yield row by row when the call streams.
+    """
+
+    def __init__(self, url, classify, rows = None):
+        self.url = url
+        self.classify = classify
+        self.rows = rows
+
+
+def _planned(plan):
+    """Make an endpoint method of `plan`.
+
+    `plan` returns the `_Request` to make, or the result itself when the
+    arguments need no request. The async clients (see `similarweb.aio`)
+    run the same plans over their own transport. Calls are labelled
+    for metrics and run through the client's hooks, if any; a streamed
+    call is observed while its rows are read (see `_Client._stream_rows`).
+    """
+    name = plan.__name__
+
+    def execute(self, request):
+        if not isinstance(request, _Request):
+            return request
+        return request.classify(self._get(request.url))
+
+    @wraps(plan)
+    def endpoint(self, *args, **kwargs):
+        request = plan(self, *args, **kwargs)
+        if isinstance(request, _Request) and request.rows is not None:
+            return self._stream_rows(name, request)
+        if self.metrics is None and self.hooks is None:
+            return execute(self, request)
+        self._last_request.endpoint = name
+        if self.hooks is None:
+            result = execute(self, request)
+        else:
+            call = self._last_request.call = hooks.Call(name)
+            try:
+                result = self.hooks.run(call, partial(execute, self, request))
+            finally:
+                self._last_request.call = None
+        if self.metrics is not None:
+            self.metrics.outcome(name, result)
+        return result
+    endpoint.plan = plan
+    return endpoint
+
+
+class _Client(object):
+    """State shared by the API clients.
+
+    A client holds no per-request state, so one instance can serve any
+    number of threads. `full_url` reports the last URL requested by the
+    calling thread only. Pass a `cache` (see `similarweb.cache`) to serve
+    repeated requests without a round trip, or only from the cache when
+    it is offline. A `rate_limiter` (see `similarweb.ratelimit`) paces
+    the requests that do go out and accounts for their credits.
+    `user_key` may be a `KeyPool` to spread requests over several keys.
+    Identical requests in flight at the same time share one round trip
+    through `single_flight`, by default a group shared by all clients;
+    pass False to send every request. `api_root` replaces the scheme and
+    host requests go to, e.g. a local stub server (see
+    `similarweb.stubserver`); it defaults to the SIMILARWEB_API_ROOT
+    environment variable when that is set. Pass `metrics` (see
+    `similarweb.metrics`) to record per-endpoint counts and timings,
+    and `hooks` (see `similarweb.hooks`) to run callbacks around
+    requests and trace them.
+    """
+
+    def __init__(self, user_key, transport = None, cache = None,
+                 rate_limiter = None, single_flight = True, api_root = None,
+                 metrics = None, hooks = None):
+        api_root = api_root or os.environ.get("SIMILARWEB_API_ROOT")
+        if api_root and self.base_url.startswith(API_ROOT):
+            self.base_url = api_root.rstrip("/") + self.base_url[len(API_ROOT):]
         self.user_key = user_key
-        self.base_url = "https://api.similarweb.com/Site/{0}/v1/"
-        self.full_url = ""
-
-    def traffic(self, url):
+        self.transport = transport
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.hooks = hooks
+        if single_flight is True:
+            single_flight = singleflight.default_group()
+        self.single_flight = single_flight or None
+        self._last_request = threading.local()
+
+    @property
+    def full_url(self):
+        return getattr(self._last_request, "full_url", "")
+
+    def _get(self, url):
+        self._last_request.full_url = url
+        if self.cache is not None:
+            response = self.cache.get(url)
+            if response is not None:
+                if self.metrics is not None:
+                    self.metrics.cache_hit(self._endpoint(url))
+                call = self._call()
+                if call is not None:
+                    call.cached = True
+                    call.request(url)
+                return response
+            if self.cache.offline:
+                return helpers.BAD_OFFLINE_MISS
+
+        if self.single_flight is not None:
+            key = (helpers.request_key(url), str(self.user_key))
+            return self.single_flight.do(key, partial(self._fetch, url))
+        return self._fetch(url)
+
+    def _fetch(self, url):
+        if isinstance(self.user_key, KeyPool):
+            response = self._send_with_key_pool(url)
+        else:
+            response = self._send(url, self.user_key)
+
+        if self.cache is not None and helpers.is_cacheable(response):
+            self.cache.set(url, response)
+        return response
+
+    def _send(self, url, user_key, pooled = False):
+        if self.rate_limiter is not None:
+            endpoint = helpers.endpoint_name(url)
+            if not self.rate_limiter.acquire(user_key, endpoint):
+                return helpers.BAD_QUOTA_EXCEEDED
+
+        call = self._call()
+        # A pooled key that is throttled goes back to the pool for rotation
+        retry_throttled = not pooled
+        if self.metrics is None and call is None:
+            return helpers.get_http_response(url, self.transport, retry_throttled)
+
+        if call is not None:
+            self.hooks.requesting(call, url)
+        started = time.time()
+        response = helpers.send_http_request(url, self.transport,
+                                             retry_throttled = retry_throttled)
+        downloaded_at = time.time()
+        size = 0 if helpers.is_request_failure(response) else len(response.content)
+        result = helpers.decode_http_response(response)
+        decoded_at = time.time()
+
+        if self.metrics is not None:
+            self.metrics.request(self._endpoint(url), decoded_at - started, size)
+        if call is not None:
+            # A transport that does not stamp `received` reports it all as ttfb
+            headers_at = getattr(response, "received", downloaded_at)
+            self.hooks.responded(call, response, {"ttfb": headers_at - started,
+                                                  "download": downloaded_at - headers_at,
+                                                  "decode": decoded_at - downloaded_at})
+        return result
+
+    def _call(self):
+        """The hooks.Call of the endpoint call running on this thread."""
+        if self.hooks is None:
+            return None
+        return getattr(self._last_request, "call", None)
+
+    def _endpoint(self, url):
+        """The method making the current request, else the URL's endpoint."""
+        return (getattr(self._last_request, "endpoint", None) or
+                helpers.endpoint_method(url))
+
+    def _send_with_key_pool(self, url):
+        pool = self.user_key
+        while True:
+            key = pool.acquire()
+            if key is None:
+                return pool.exhausted()
+            key_url = helpers.with_user_key(url, key)
+            self._last_request.full_url = key_url
+            response = self._send(key_url, key, pooled = True)
+            if not pool.record(key, response):
+                return response
+
+    def _stream(self, url, key, call = None):
+        """Yield the rows of `key` from the response as they arrive.
+
+        A page in the cache is served from it, and with an offline cache
+        a miss raises NotAPage(BAD_OFFLINE_MISS). Otherwise streamed
+        responses bypass the cache and single-flight, which need the
+        whole body. Raises streaming.NotAPage as helpers.iter_http_rows
+        does. With a `call` (a hooks.Call) the round trip is recorded in
+        the metrics and hooks once the body has been read.
+        """
+        self._last_request.full_url = url
+        if self.cache is not None:
+            response = self.cache.get(url)
+            if response is not None:
+                if call is not None:
+                    call.cached = True
+                    call.request(url)
+                    if self.metrics is not None:
+                        self.metrics.cache_hit(call.endpoint)
+                if key not in response:
+                    raise streaming.NotAPage(response)
+                for row in response[key]:
+                    yield row
+                return
+            if self.cache.offline:
+                raise streaming.NotAPage(helpers.BAD_OFFLINE_MISS)
+
+        user_key = self.user_key
+        if isinstance(user_key, KeyPool):
+            user_key = self.user_key.acquire()
+            if user_key is None:
+                raise streaming.NotAPage(self.user_key.exhausted())
+            url = helpers.with_user_key(url, user_key)
+            self._last_request.full_url = url
+
+        if self.rate_limiter is not None:
+            endpoint = helpers.endpoint_name(url)
+            if not self.rate_limiter.acquire(user_key, endpoint):
+                raise streaming.NotAPage(helpers.BAD_QUOTA_EXCEEDED)
+
+        if call is None:
+            for row in helpers.iter_http_rows(url, key, self.transport):
+                yield row
+            return
+
+        if self.hooks is not None:
+            self.hooks.requesting(call, url)
+        progress = {}
+        started = time.time()
+        try:
+            for row in helpers.iter_http_rows(url, key, self.transport,
+                                              progress = progress):
+                yield row
+        finally:
+            finished = time.time()
+            size = progress.get("size", 0)
+            if self.metrics is not None:
+                self.metrics.request(call.endpoint, finished - started, size)
+            if self.hooks is not None:
+                headers_at = progress.get("received", finished)
+                self.hooks.responded(call, progress.get("response"),
+                                     {"ttfb": headers_at - started,
+                                      "download": finished - headers_at},
+                                     size)
+
+    def _stream_rows(self, endpoint, request):
+        """Yield the rows of a streamed call; a failure is its last row.
+
+        Metrics and hooks cover the whole iteration: the request is
+        counted and timed once the body has been read, and the outcome
+        and span recorded when the rows run out or the caller stops
+        reading, failed if an error row was yielded.
+        """
+        if self.metrics is None and self.hooks is None:
+            for row in self._classified_rows(request, None):
+                yield row
+            return
+
+        call = hooks.Call(endpoint)
+        if self.hooks is None:
+            rows = self._classified_rows(request, call)
+        else:
+            rows = self._hooked_rows(request, call)
+        try:
+            for row in rows:
+                yield row
+        except GeneratorExit:
+            rows.close()
+            if self.metrics is not None:
+                self.metrics.outcome(endpoint, call.result)
+            raise
+        if self.metrics is not None:
+            self.metrics.outcome(endpoint, call.result)
+
+    def _hooked_rows(self, request, call):
+        with self.hooks.span(call) as span:
+            try:
+                for row in self._classified_rows(request, call):
+                    yield row
+            except GeneratorExit:
+                self.hooks.returned(call, span)
+                raise
+            except Exception as e:
+                self.hooks.raised(call, span, e)
+                raise
+            self.hooks.returned(call, span)
+
+    def _classified_rows(self, request, call):
+        try:
+            for row in self._stream(request.url, request.rows, call):
+                yield row
+        except streaming.NotAPage as e:
+            error = request.classify(e.response)
+            if call is not None:
+                call.result = error
+            yield error
+
+
+class TrafficClient(_Client):
+    base_url = API_ROOT + "/Site/{0}/v1/"
+
+    @_planned
+    def traffic(self, url, as_frame = False):
         traffic_url = ("traffic?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url) + traffic_url
-        response = helpers.get_http_response(self.full_url)
+        full_url = self.base_url.format(url) + traffic_url
+        return _Request(full_url, partial(self._classify_traffic,
+                                          as_frame = as_frame))
 
+    def _classify_traffic(self, response, as_frame = False):
         # Happy path
-        if "GlobalRank" in response.keys():
+        if "GlobalRank" in response.keys() and as_frame:
+            return frames.traffic(response)
+        elif "GlobalRank" in response.keys():
             top_country_shares = helpers.dictify(response["TopCountryShares"],
                                                           "CountryCode",
                                                           "TrafficShare",
@@ -34,6 +345,10 @@ class TrafficClient(object):
 
             return response
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -47,41 +362,180 @@ class TrafficClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
-    def visits(self, url, gr, start, end, md = False):
+    @_planned
+    def visits(self, url, gr, start, end, md = False,
+               columnar = False, as_frame = False):
         visits_url = ("visits?gr={0}&start={1}&end={2}"
                       "&md={3}&UserKey={4}"
                      ).format(gr, start, end, md, self.user_key)
-        self.full_url = self.base_url.format(url) + visits_url
-        return self._results_from_web_traffic_apis(self.full_url)
-
-    def page_views(self, url, gr, start, end, md = False):
+        full_url = self.base_url.format(url) + visits_url
+        return _Request(full_url, partial(self._classify_web_traffic_apis,
+                                          columnar = columnar,
+                                          as_frame = as_frame))
+
+    @_planned
+    def page_views(self, url, gr, start, end, md = False,
+                   columnar = False, as_frame = False):
         page_views_url = ("pageviews?gr={0}&start={1}&end={2}"
                          "&md={3}&UserKey={4}"
                         ).format(gr, start, end, md, self.user_key)
-        self.full_url = self.base_url.format(url) + page_views_url
-        return self._results_from_web_traffic_apis(self.full_url)
-
-    def visit_duration(self, url, gr, start, end, md = False):
+        full_url = self.base_url.format(url) + page_views_url
+        return _Request(full_url, partial(self._classify_web_traffic_apis,
+                                          columnar = columnar,
+                                          as_frame = as_frame))
+
+    @_planned
+    def visit_duration(self, url, gr, start, end, md = False,
+                       columnar = False, as_frame = False):
         visit_duration_url = ("visitduration?gr={0}&start={1}&end={2}"
                               "&md={3}&UserKey={4}"
                              ).format(gr, start, end, md, self.user_key)
-        self.full_url = self.base_url.format(url) + visit_duration_url
-        return self._results_from_web_traffic_apis(self.full_url)
-
-    def bounce_rate(self, url, gr, start, end, md = False):
+        full_url = self.base_url.format(url) + visit_duration_url
+        return _Request(full_url, partial(self._classify_web_traffic_apis,
+                                          columnar = columnar,
+                                          as_frame = as_frame))
+
+    @_planned
+    def bounce_rate(self, url, gr, start, end, md = False,
+                    columnar = False, as_frame = False):
         bounce_rate_url = ("bouncerate?gr={0}&start={1}&end={2}"
                            "&md={3}&UserKey={4}"
                           ).format(gr, start, end, md, self.user_key)
-        self.full_url = self.base_url.format(url) + bounce_rate_url
-        return self._results_from_web_traffic_apis(self.full_url)
-
-    def _results_from_web_traffic_apis(self, url):
-        response = helpers.get_http_response(self.full_url)
-
+        full_url = self.base_url.format(url) + bounce_rate_url
+        return _Request(full_url, partial(self._classify_web_traffic_apis,
+                                          columnar = columnar,
+                                          as_frame = as_frame))
+
+    def engagement(self, url, gr, start, end, md = False,
+                   metrics = helpers.TIME_SERIES_METRICS):
+        """Fetch several time-series metrics at once, aligned by date.
+
+        Returns `{date: {metric: value}}` ordered by date, with None for a
+        metric that has no value on a date. If any metric fails its error
+        is returned instead.
+        """
+        for metric in metrics:
+            if metric not in helpers.TIME_SERIES_METRICS:
+                return helpers.BAD_METRIC
+
+        def fetch(metric):
+            return getattr(self, metric)(url, gr, start, end, md)
+
+        results = dict(helpers.fan_out(fetch, metrics,
+                                       max_workers = len(metrics) or 1))
+        for metric in metrics:
+            if "Error" in results[metric]:
+                return results[metric]
+
+        dates = set()
+        for metric in metrics:
+            dates.update(results[metric])
+        return dict((date, dict((metric, results[metric].get(date))
+                                for metric in metrics))
+                    for date in sorted(dates))
+
+    def sharded(self, metric, url, gr, start, end, md = False,
+                months_per_shard = 12, max_workers = 4, retries = 2):
+        """Fetch a long time series as several shorter requests.
+
+        `metric` names one of the time-series endpoints, e.g. "visits".
+        The range is split every `months_per_shard` months, the shards
+        are fetched in parallel and merged into one date-ordered mapping.
+        Shards failing with a retryable error are fetched again up to
+        `retries` times; if one still fails its error is returned.
+        """
+        if metric not in helpers.TIME_SERIES_METRICS:
+            return helpers.BAD_METRIC
+        if months_per_shard < 1:
+            return helpers.BAD_SHARD_SIZE
+
+        method = getattr(self, metric)
+        def fetch(shard):
+            return method(url, gr, shard[0], shard[1], md)
+
+        all_shards = helpers.month_shards(start, end, months_per_shard)
+        shards = all_shards
+        results = {}
+        for attempt in range(retries + 1):
+            for shard, result in helpers.fan_out(fetch, shards,
+                                                 max_workers = max_workers):
+                results[shard] = result
+            shards = [shard for shard in shards
+                      if results[shard] in helpers.RETRYABLE_FAILURES]
+            if not shards:
+                break
+
+        merged = {}
+        for shard in all_shards:
+            if "Error" in results[shard]:
+                return results[shard]
+            merged.update(results[shard])
+        return dict(sorted(merged.items()))
+
+    def refresh(self, store, metric, url, gr, start, end, md = False):
+        """Bring a stored time series up to date and return it.
+
+        Only the months `store` (see `similarweb.store`) does not cover
+        are requested: from `start` through the month of its first date,
+        and from the month of its last date through `end`. The responses
+        are appended to the store. Returns the stored series for `start`
+        through `end`, or the error of a request. A range that cannot
+        be parsed or is out of order is sent as is, for the API to
+        report like any other call.
+        """
+        if metric not in helpers.TIME_SERIES_METRICS:
+            return helpers.BAD_METRIC
+
+        try:
+            first_month = helpers.parse_month(start)
+            last_month = helpers.parse_month(end)
+        except ValueError:
+            first_month = last_month = None
+        if first_month is None or first_month > last_month:
+            # Unparseable or out-of-order: the API reports it as for visits
+            return getattr(self, metric)(url, gr, start, end, md)
+
+        first_date = store.first_date(url, metric, gr, md)
+        last_date = store.last_date(url, metric, gr, md)
+        if first_date is None:
+            windows = [(first_month, last_month)]
+        else:
+            head = tuple(int(x) for x in first_date.split("-")[:2])
+            tail = tuple(int(x) for x in last_date.split("-")[:2])
+            windows = [(max(tail, first_month), last_month)]
+            if first_month < head:
+                windows.insert(0, (first_month, min(head, last_month)))
+
+        for window_start, window_end in windows:
+            if window_start > window_end:
+                continue
+            result = getattr(self, metric)(url, gr, helpers.format_month(*window_start),
+                                           helpers.format_month(*window_end), md)
+            if "Error" in result:
+                return result
+            store.append(url, metric, gr, md, result)
+
+        first = "{0:04d}-{1:02d}".format(*first_month)
+        last = "{0:04d}-{1:02d}".format(*last_month)
+        return dict((date, value) for date, value
+                    in store.series(url, metric, gr, md).items()
+                    if first <= date[:7] <= last)
+
+    def _classify_web_traffic_apis(self, response, columnar = False,
+                                   as_frame = False):
         # Handle good response (happy path)
-        if "Values" in response.keys():
+        if "Values" in response.keys() and as_frame:
+            return frames.time_series(response["Values"])
+        elif "Values" in response.keys() and columnar:
+            return helpers.columnar(response["Values"], "Date", "Value",
+                                    keys_dtype = "datetime64[D]")
+        elif "Values" in response.keys():
             return helpers.dictify(response["Values"], "Date", "Value")
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -105,52 +559,82 @@ class TrafficClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
+    def traffic_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.traffic, urls, (), max_workers)
 
-class ContentClient(object):
-    def __init__(self, user_key):
-        self.user_key = user_key
-        self.base_url = "https://api.similarweb.com/Site/{0}/v2/"
-        self.full_url = ""
+    def visits_many(self, urls, gr, start, end, md = False, max_workers = 16):
+        return helpers.fan_out(self.visits, urls,
+                               (gr, start, end, md), max_workers)
 
-    def similar_sites(self, url):
-        similar_sites_url = ("similarsites?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url) + similar_sites_url
-        return self._results_from_non_category_content_apis(self.full_url,
-                                                            "SimilarSites",
-                                                            "Url",
-                                                            "Score")
+    def page_views_many(self, urls, gr, start, end, md = False,
+                        max_workers = 16):
+        return helpers.fan_out(self.page_views, urls,
+                               (gr, start, end, md), max_workers)
 
-    def also_visited(self, url):
-        also_visited_url = ("alsovisited?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url) + also_visited_url
-        return self._results_from_non_category_content_apis(self.full_url,
-                                                            "AlsoVisited",
-                                                            "Url",
-                                                            "Score")
+    def visit_duration_many(self, urls, gr, start, end, md = False,
+                            max_workers = 16):
+        return helpers.fan_out(self.visit_duration, urls,
+                               (gr, start, end, md), max_workers)
 
-    def tags(self, url):
-        tags_url = ("tags?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url) + tags_url
-        return self._results_from_non_category_content_apis(self.full_url,
-                                                            "Tags",
-                                                            "Name",
-                                                            "Score")
-
-    def _results_from_non_category_content_apis(self,
-                                                url,
-                                                happy_key,
-                                                item_key,
-                                                item_value):
-        response = helpers.get_http_response(url)
+    def bounce_rate_many(self, urls, gr, start, end, md = False,
+                         max_workers = 16):
+        return helpers.fan_out(self.bounce_rate, urls,
+                               (gr, start, end, md), max_workers)
+
+
+class ContentClient(_Client):
+    base_url = API_ROOT + "/Site/{0}/v2/"
 
+    @_planned
+    def similar_sites(self, url, columnar = False, as_frame = False):
+        similar_sites_url = ("similarsites?UserKey={0}").format(self.user_key)
+        full_url = self.base_url.format(url) + similar_sites_url
+        return _Request(full_url, partial(
+            self._classify_non_category_content_apis, happy_key = "SimilarSites",
+            item_key = "Url", item_value = "Score", columnar = columnar,
+            as_frame = as_frame))
+
+    @_planned
+    def also_visited(self, url, columnar = False, as_frame = False):
+        also_visited_url = ("alsovisited?UserKey={0}").format(self.user_key)
+        full_url = self.base_url.format(url) + also_visited_url
+        return _Request(full_url, partial(
+            self._classify_non_category_content_apis, happy_key = "AlsoVisited",
+            item_key = "Url", item_value = "Score", columnar = columnar,
+            as_frame = as_frame))
+
+    @_planned
+    def tags(self, url, columnar = False, as_frame = False):
+        tags_url = ("tags?UserKey={0}").format(self.user_key)
+        full_url = self.base_url.format(url) + tags_url
+        return _Request(full_url, partial(
+            self._classify_non_category_content_apis, happy_key = "Tags",
+            item_key = "Name", item_value = "Score", columnar = columnar,
+            as_frame = as_frame))
+
+    def _classify_non_category_content_apis(self,
+                                            response,
+                                            happy_key,
+                                            item_key,
+                                            item_value,
+                                            columnar = False,
+                                            as_frame = False):
         # Handle good response (happy path)
-        if str(happy_key) in response.keys():
+        if str(happy_key) in response.keys() and as_frame:
+            return frames.records(response[happy_key], [item_key, item_value])
+        elif str(happy_key) in response.keys() and columnar:
+            return helpers.columnar(response[happy_key], item_key, item_value)
+        elif str(happy_key) in response.keys():
             return helpers.dictify(response[happy_key], item_key, item_value)
 
         # The API response was not JSON and get_http_response caught ValueError
         elif response == helpers.BAD_URL:
             return response
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -164,27 +648,35 @@ class ContentClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
-    def category(self, url):
+    @_planned
+    def category(self, url, as_frame = False):
         category_url = ("category?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url) + category_url
-        return self._results_from_category_content_apis(self.full_url)
+        full_url = self.base_url.format(url) + category_url
+        return _Request(full_url, partial(
+            self._classify_category_content_apis, as_frame = as_frame))
 
-    def category_rank(self, url):
+    @_planned
+    def category_rank(self, url, as_frame = False):
         category_rank_url = ("categoryrank?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url) + category_rank_url
-        return self._results_from_category_content_apis(self.full_url)
-
-    def _results_from_category_content_apis(self, url):
-        response = helpers.get_http_response(url)
+        full_url = self.base_url.format(url) + category_rank_url
+        return _Request(full_url, partial(
+            self._classify_category_content_apis, as_frame = as_frame))
 
+    def _classify_category_content_apis(self, response, as_frame = False):
         # Handle good response (happy path)
-        if "Category" in response.keys():
+        if "Category" in response.keys() and as_frame:
+            return frames.single_row(response)
+        elif "Category" in response.keys():
             return response
 
         # The API response was not JSON and get_http_response caught ValueError
         elif response == helpers.BAD_URL:
             return response
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -198,53 +690,118 @@ class ContentClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
+    def similar_sites_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.similar_sites, urls, (), max_workers)
 
-class SourcesClient(object):
-    def __init__(self, user_key):
-        self.user_key = user_key
-        self.base_url = "https://api.similarweb.com/Site/{0}/{1}/"
-        self.full_url = ""
+    def also_visited_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.also_visited, urls, (), max_workers)
+
+    def tags_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.tags, urls, (), max_workers)
+
+    def category_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.category, urls, (), max_workers)
+
+    def category_rank_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.category_rank, urls, (), max_workers)
 
-    def organic_search_keywords(self, url, page, start, end, md = False):
+
+class SourcesClient(_Client):
+    base_url = API_ROOT + "/Site/{0}/{1}/"
+
+    @_planned
+    def organic_search_keywords(self, url, page, start, end, md = False,
+                                stream = False, as_frame = False):
         organic_search_keywords_url = ("orgsearch?start={0}&end={1}"
                                        "&md={2}&page={3}&UserKey={4}"
                                       ).format(start, end, md, str(page), self.user_key)
-        self.full_url = self.base_url.format(url, "v1") + organic_search_keywords_url
-        return self._results_from_search_keywords_apis(self.full_url)
-
-    def organic_keyword_competitors(self, url, page, start, end, md = False):
+        full_url = self.base_url.format(url, "v1") + organic_search_keywords_url
+        if stream:
+            return _Request(full_url, self._classify_search_keywords_apis, "Data")
+        return _Request(full_url, partial(self._classify_search_keywords_apis,
+                                          as_frame = as_frame))
+
+    @_planned
+    def organic_keyword_competitors(self, url, page, start, end, md = False,
+                                    stream = False, as_frame = False):
         organic_keyword_competitors_url = ("orgkwcompetitor?start={0}&end={1}"
                                            "&md={2}&page={3}&UserKey={4}"
                                           ).format(start, end, md, str(page), self.user_key)
-        self.full_url = self.base_url.format(url, "v1") + organic_keyword_competitors_url
-        return self._results_from_search_keywords_apis(self.full_url)
-
-    def paid_keyword_competitors(self, url, page, start, end, md = False):
+        full_url = self.base_url.format(url, "v1") + organic_keyword_competitors_url
+        if stream:
+            return _Request(full_url, self._classify_search_keywords_apis, "Data")
+        return _Request(full_url, partial(self._classify_search_keywords_apis,
+                                          as_frame = as_frame))
+
+    @_planned
+    def paid_keyword_competitors(self, url, page, start, end, md = False,
+                                 stream = False, as_frame = False):
         paid_keyword_competitors_url = ("paidkwcompetitor?start={0}&end={1}"
                                         "&md={2}&page={3}&UserKey={4}"
                                        ).format(start, end, md, str(page), self.user_key)
-        self.full_url = self.base_url.format(url, "v1") + paid_keyword_competitors_url
-        return self._results_from_search_keywords_apis(self.full_url)
-
-    def paid_search_keywords(self, url, page, start, end, md = False):
+        full_url = self.base_url.format(url, "v1") + paid_keyword_competitors_url
+        if stream:
+            return _Request(full_url, self._classify_search_keywords_apis, "Data")
+        return _Request(full_url, partial(self._classify_search_keywords_apis,
+                                          as_frame = as_frame))
+
+    @_planned
+    def paid_search_keywords(self, url, page, start, end, md = False,
+                             stream = False, as_frame = False):
         paid_search_keywords_url = ("paidsearch?start={0}&end={1}"
                                     "&md={2}&page={3}&UserKey={4}"
                                    ).format(start, end, md, str(page), self.user_key)
-        self.full_url = self.base_url.format(url, "v1") + paid_search_keywords_url
-        return self._results_from_search_keywords_apis(self.full_url)
-
-    def referrals(self, url, page, start, end):
+        full_url = self.base_url.format(url, "v1") + paid_search_keywords_url
+        if stream:
+            return _Request(full_url, self._classify_search_keywords_apis, "Data")
+        return _Request(full_url, partial(self._classify_search_keywords_apis,
+                                          as_frame = as_frame))
+
+    @_planned
+    def referrals(self, url, page, start, end, stream = False,
+                  as_frame = False):
         referrals_url = ("referrals?start={0}&end={1}"
                          "&page={2}&UserKey={3}"
                         ).format(start, end, str(page), self.user_key)
-        self.full_url = self.base_url.format(url, "v1") + referrals_url
-        return self._results_from_search_keywords_apis(self.full_url)
-
-    def _results_from_search_keywords_apis(self, url):
-        response = helpers.get_http_response(url)
-
+        full_url = self.base_url.format(url, "v1") + referrals_url
+        if stream:
+            return _Request(full_url, self._classify_search_keywords_apis, "Data")
+        return _Request(full_url, partial(self._classify_search_keywords_apis,
+                                          as_frame = as_frame))
+
+    def iter_organic_search_keywords(self, url, start, end, md = False,
+                                     window = 4):
+        return helpers.iter_pages(partial(self.organic_search_keywords, url),
+                                  (start, end, md), window)
+
+    def iter_organic_keyword_competitors(self, url, start, end, md = False,
+                                         window = 4):
+        return helpers.iter_pages(partial(self.organic_keyword_competitors, url),
+                                  (start, end, md), window)
+
+    def iter_paid_keyword_competitors(self, url, start, end, md = False,
+                                      window = 4):
+        return helpers.iter_pages(partial(self.paid_keyword_competitors, url),
+                                  (start, end, md), window)
+
+    def iter_paid_search_keywords(self, url, start, end, md = False,
+                                  window = 4):
+        return helpers.iter_pages(partial(self.paid_search_keywords, url),
+                                  (start, end, md), window)
+
+    def iter_referrals(self, url, start, end, window = 4):
+        return helpers.iter_pages(partial(self.referrals, url),
+                                  (start, end), window)
+
+    def _classify_search_keywords_apis(self, response, as_frame = False):
         # Happy path
-        if "Data" in response.keys():
+        if "Data" in response.keys() and as_frame:
+            return frames.records(response["Data"], None)
+        elif "Data" in response.keys():
+            return response
+
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
             return response
 
         # Handle invalid API key
@@ -270,13 +827,18 @@ class SourcesClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
-    def social_referrals(self, url):
+    @_planned
+    def social_referrals(self, url, as_frame = False):
         social_referrals_url = ("SocialReferringSites?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url, "v1") + social_referrals_url
-        response = helpers.get_http_response(self.full_url)
+        full_url = self.base_url.format(url, "v1") + social_referrals_url
+        return _Request(full_url, partial(self._classify_social_referrals,
+                                          as_frame = as_frame))
 
+    def _classify_social_referrals(self, response, as_frame = False):
         # Happy path
-        if "SocialSources" in response.keys():
+        if "SocialSources" in response.keys() and as_frame:
+            return frames.records(response["SocialSources"], ["Source", "Value"])
+        elif "SocialSources" in response.keys():
             social_sources = helpers.dictify(response["SocialSources"],
                                              "Source",
                                              "Value")
@@ -284,6 +846,10 @@ class SourcesClient(object):
             response["SocialSources"] = social_sources
             return response
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -297,19 +863,28 @@ class SourcesClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
-    def destinations(self, url):
+    @_planned
+    def destinations(self, url, as_frame = False):
         destinations_url = ("leadingdestinationsites?UserKey={0}").format(self.user_key)
-        self.full_url = self.base_url.format(url, "v2") + destinations_url
-        response = helpers.get_http_response(self.full_url)
+        full_url = self.base_url.format(url, "v2") + destinations_url
+        return _Request(full_url, partial(self._classify_destinations,
+                                          as_frame = as_frame))
 
+    def _classify_destinations(self, response, as_frame = False):
         # Happy path
-        if "Sites" in response.keys():
+        if "Sites" in response.keys() and as_frame:
+            return frames.strings(response["Sites"], "Site")
+        elif "Sites" in response.keys():
             return response
 
         # The API response was not JSON and get_http_response caught ValueError
         elif response == helpers.BAD_URL:
             return response
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -323,26 +898,61 @@ class SourcesClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
+    def organic_search_keywords_many(self, urls, page, start, end, md = False,
+                                     max_workers = 16):
+        return helpers.fan_out(self.organic_search_keywords, urls,
+                               (page, start, end, md), max_workers)
 
-class MobileClient(object):
-    def __init__(self, user_key):
-        self.user_key = user_key
-        self.base_url = "https://api.similarweb.com/Mobile/{0}/{1}/"
-        self.full_url = ""
+    def organic_keyword_competitors_many(self, urls, page, start, end, md = False,
+                                         max_workers = 16):
+        return helpers.fan_out(self.organic_keyword_competitors, urls,
+                               (page, start, end, md), max_workers)
+
+    def paid_keyword_competitors_many(self, urls, page, start, end, md = False,
+                                      max_workers = 16):
+        return helpers.fan_out(self.paid_keyword_competitors, urls,
+                               (page, start, end, md), max_workers)
+
+    def paid_search_keywords_many(self, urls, page, start, end, md = False,
+                                  max_workers = 16):
+        return helpers.fan_out(self.paid_search_keywords, urls,
+                               (page, start, end, md), max_workers)
 
-    def app_details(self, app_id, app_store):
+    def referrals_many(self, urls, page, start, end, max_workers = 16):
+        return helpers.fan_out(self.referrals, urls,
+                               (page, start, end), max_workers)
+
+    def social_referrals_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.social_referrals, urls, (), max_workers)
+
+    def destinations_many(self, urls, max_workers = 16):
+        return helpers.fan_out(self.destinations, urls, (), max_workers)
+
+
+class MobileClient(_Client):
+    base_url = API_ROOT + "/Mobile/{0}/{1}/"
+
+    @_planned
+    def app_details(self, app_id, app_store, as_frame = False):
         if helpers.input_to_app_store_is_bad(str(app_store)):
             return helpers.BAD_APP_STORE
 
         app_store_num = helpers.app_store_id_to_number(app_store)
         temp_url = self.base_url.format(app_store_num, str(app_id))
-        self.full_url = "{0}v1/GetAppDetails?UserKey={1}".format(temp_url,
-                                                                  self.user_key)
-
-        response = helpers.get_http_response(self.full_url)
+        full_url = "{0}v1/GetAppDetails?UserKey={1}".format(temp_url,
+                                                             self.user_key)
+        return _Request(full_url, partial(self._classify_app_details,
+                                          as_frame = as_frame))
 
+    def _classify_app_details(self, response, as_frame = False):
         # Happy path (including no stats)
-        if "Title" in response.keys():
+        if "Title" in response.keys() and as_frame:
+            return frames.single_row(response)
+        elif "Title" in response.keys():
+            return response
+
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
             return response
 
         # Handle invalid API key
@@ -353,15 +963,23 @@ class MobileClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
-    def google_app_installs(self, app_id):
+    @_planned
+    def google_app_installs(self, app_id, as_frame = False):
         temp_url = self.base_url.format(0, str(app_id))
-        self.full_url = "{0}v1/GetAppInstalls?UserKey={1}".format(temp_url,
-                                                                  self.user_key)
-
-        response = helpers.get_http_response(self.full_url)
+        full_url = "{0}v1/GetAppInstalls?UserKey={1}".format(temp_url,
+                                                             self.user_key)
+        return _Request(full_url, partial(self._classify_google_app_installs,
+                                          as_frame = as_frame))
 
+    def _classify_google_app_installs(self, response, as_frame = False):
         # Happy path (including no stats)
-        if "InstallsMin" in response.keys():
+        if "InstallsMin" in response.keys() and as_frame:
+            return frames.single_row(response)
+        elif "InstallsMin" in response.keys():
+            return response
+
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
             return response
 
         # Handle invalid API key
@@ -372,21 +990,35 @@ class MobileClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
-    def site_related_apps(self, app_id, app_store):
+    @_planned
+    def site_related_apps(self, app_id, app_store, columnar = False,
+                          as_frame = False):
         if helpers.input_to_app_store_is_bad(str(app_store)):
             return helpers.BAD_APP_STORE
 
         app_store_num = helpers.app_store_id_to_number(app_store)
         temp_url = self.base_url.format(app_store_num, str(app_id))
-        self.full_url = "{0}v1/GetRelatedSiteApps?UserKey={1}".format(temp_url,
-                                                                  self.user_key)
-
-        response = helpers.get_http_response(self.full_url)
-
+        full_url = "{0}v1/GetRelatedSiteApps?UserKey={1}".format(temp_url,
+                                                             self.user_key)
+        return _Request(full_url, partial(self._classify_site_related_apps,
+                                          columnar = columnar,
+                                          as_frame = as_frame))
+
+    def _classify_site_related_apps(self, response, columnar = False,
+                                    as_frame = False):
         # Happy path
-        if "RelatedApps" in response.keys():
+        if "RelatedApps" in response.keys() and as_frame:
+            return frames.records(response["RelatedApps"], ["AppId", "Title"])
+        elif "RelatedApps" in response.keys() and columnar:
+            return helpers.columnar(response["RelatedApps"], "AppId", "Title",
+                                    values_dtype = "object")
+        elif "RelatedApps" in response.keys():
             return helpers.dictify(response["RelatedApps"], "AppId", "Title")
 
+        # The request never reached the API (see helpers.REQUEST_FAILURES)
+        elif helpers.is_request_failure(response):
+            return response
+
         # Handle invalid API key
         elif "Error" in response.keys():
             return helpers.BAD_API_KEY
@@ -399,3 +1031,14 @@ class MobileClient(object):
         else:
             return helpers.BAD_UNKNOWN_ERROR
 
+    def app_details_many(self, app_ids, app_store, max_workers = 16):
+        return helpers.fan_out(self.app_details, app_ids,
+                               (app_store,), max_workers)
+
+    def google_app_installs_many(self, app_ids, max_workers = 16):
+        return helpers.fan_out(self.google_app_installs, app_ids,
+                               (), max_workers)
+
+    def site_related_apps_many(self, app_ids, app_store, max_workers = 16):
+        return helpers.fan_out(self.site_related_apps, app_ids,
+                               (app_store,), max_workers)
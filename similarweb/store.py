@@ -0,0 +1,103 @@
+import threading
+
+
+class MemorySeriesStore(object):
+    """Time series already downloaded, keyed by (domain, metric, gr, md).
+
+    Used by `TrafficClient.refresh` to request only the dates missing
+    locally. Dates are the "YYYY-MM-DD" keys the time-series endpoints
+    return.
+    """
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def first_date(self, domain, metric, gr, md):
+        with self._lock:
+            series = self._series.get((domain, metric, gr, bool(md)))
+            if not series:
+                return None
+            return min(series)
+
+    def last_date(self, domain, metric, gr, md):
+        with self._lock:
+            series = self._series.get((domain, metric, gr, bool(md)))
+            if not series:
+                return None
+            return max(series)
+
+    def append(self, domain, metric, gr, md, values):
+        with self._lock:
+            key = (domain, metric, gr, bool(md))
+            self._series.setdefault(key, {}).update(values)
+
+    def series(self, domain, metric, gr, md):
+        with self._lock:
+            series = self._series.get((domain, metric, gr, bool(md)), {})
+            return dict(sorted(series.items()))
+
+
+class SqliteSeriesStore(object):
+    """`MemorySeriesStore` kept in a SQLite file that survives restarts."""
+
+    def __init__(self, path, timeout = 30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connection().executescript(
+            "PRAGMA journal_mode=WAL;"
+            "CREATE TABLE IF NOT EXISTS series ("
+            "  domain TEXT NOT NULL,"
+            "  metric TEXT NOT NULL,"
+            "  gr TEXT NOT NULL,"
+            "  md INTEGER NOT NULL,"
+            "  date TEXT NOT NULL,"
+            "  value REAL,"
+            "  PRIMARY KEY (domain, metric, gr, md, date));")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.path, timeout = self.timeout)
+            self._local.connection = connection
+        return connection
+
+    def first_date(self, domain, metric, gr, md):
+        row = self._connection().execute(
+            "SELECT MIN(date) FROM series"
+            " WHERE domain = ? AND metric = ? AND gr = ? AND md = ?",
+            (domain, metric, gr, int(bool(md)))).fetchone()
+        return row[0]
+
+    def last_date(self, domain, metric, gr, md):
+        row = self._connection().execute(
+            "SELECT MAX(date) FROM series"
+            " WHERE domain = ? AND metric = ? AND gr = ? AND md = ?",
+            (domain, metric, gr, int(bool(md)))).fetchone()
+        return row[0]
+
+    def append(self, domain, metric, gr, md, values):
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO series"
+                " (domain, metric, gr, md, date, value)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(domain, metric, gr, int(bool(md)), date, value)
+                 for date, value in values.items()])
+
+    def series(self, domain, metric, gr, md):
+        rows = self._connection().execute(
+            "SELECT date, value FROM series"
+            " WHERE domain = ? AND metric = ? AND gr = ? AND md = ?"
+            " ORDER BY date",
+            (domain, metric, gr, int(bool(md)))).fetchall()
+        return dict(rows)
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
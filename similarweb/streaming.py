@@ -0,0 +1,170 @@
+"""Incremental parsing of the row array in large API responses.
+
+`iter_rows` turns the chunks of a response body into the items of one
+top-level array, e.g. the `Data` rows of a keyword page, decoding each
+row as soon as it is complete. Only the unparsed tail of the body is
+held in memory, so the cost of a page does not grow with its size.
+"""
+import codecs
+import re
+
+from . import decoders
+
+_WHITESPACE = " \t\r\n"
+_STRING_RUN = re.compile(r'[^"\\]*')
+
+# A body without the array is kept up to this size to be reported in
+# NotAPage; error payloads are far smaller
+_KEPT_BODY_SIZE = 1 << 16
+
+
+class NotAPage(Exception):
+    """The body had no such array; `response` is the parsed body."""
+
+    def __init__(self, response):
+        Exception.__init__(self, "response has no row array")
+        self.response = response
+
+
+class Truncated(NotAPage):
+    """The body ended before the row array did."""
+
+    def __init__(self):
+        NotAPage.__init__(self, None)
+
+
+class _ArrayFinder(object):
+    """Finds the `[` opening top-level `key`'s array in a body fed piecewise.
+
+    The scan state carries over between `feed` calls, so each piece is
+    read once and none of it needs to be kept afterwards.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.depth = 0
+        self.pending_key = None
+        self.in_string = False
+        self.escaped = False
+        self.key_parts = None  # the top-level key being read, if any
+        self.after_colon = False  # between `key`'s colon and its value
+
+    def feed(self, text):
+        """Index just past the `[` in `text`, or None if it is not there."""
+        i = 0
+        while i < len(text):
+            if self.in_string:
+                i = self._read_string(text, i)
+                continue
+            c = text[i]
+            if self.after_colon:
+                if c in _WHITESPACE:
+                    i += 1
+                    continue
+                self.after_colon = False
+                if c == "[":
+                    return i + 1
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.pending_key is None:
+                    self.key_parts = []
+            elif c == ":" and self.depth == 1:
+                self.after_colon = self.pending_key == self.key
+            elif c == "," and self.depth == 1:
+                self.pending_key = None
+            elif c in "{[":
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+            i += 1
+        return None
+
+    def _read_string(self, text, i):
+        start = i
+        while i < len(text):
+            if self.escaped:
+                self.escaped = False
+                i += 1
+                continue
+            i = _STRING_RUN.match(text, i).end()
+            if i == len(text):
+                break
+            if text[i] == "\\":
+                self.escaped = True
+                i += 1
+                continue
+            self.in_string = False
+            if self.key_parts is not None:
+                import json
+
+                self.key_parts.append(text[start:i])
+                self.pending_key = json.loads('"' + "".join(self.key_parts) + '"')
+                self.key_parts = None
+            return i + 1
+        if self.key_parts is not None:
+            self.key_parts.append(text[start:])
+        return i
+
+
+def iter_rows(chunks, key = "Data"):
+    """Yield the items of the top-level `key` array from body `chunks`.
+
+    Raises NotAPage, carrying the parsed body (or None if it is not
+    JSON, or too large to have been kept), when the body turns out to
+    have no such array, and Truncated when it ends before the array is
+    closed.
+    """
+    import json
+
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    finder = _ArrayFinder(key)
+    chunks = iter(chunks)
+    scanned = []  # the body so far, for NotAPage, while it is small
+    scanned_size = 0
+    text = None
+    for chunk in chunks:
+        piece = utf8.decode(chunk)
+        start = finder.feed(piece)
+        if start is not None:
+            text = piece[start:]
+            break
+        if scanned is not None:
+            scanned.append(chunk)
+            scanned_size += len(chunk)
+            if scanned_size > _KEPT_BODY_SIZE:
+                scanned = None
+    if text is None:
+        response = None
+        if scanned is not None:
+            try:
+                response = decoders.loads(b"".join(scanned))
+            except ValueError:
+                pass
+        raise NotAPage(response)
+
+    finished = False
+    while True:
+        i = 0
+        while i < len(text) and text[i] in _WHITESPACE + ",":
+            i += 1
+        text = text[i:]
+        if text.startswith("]"):
+            return
+        try:
+            row, end = decoder.raw_decode(text)
+        except ValueError:
+            row, end = None, None
+        # A number cut off by a chunk boundary can decode early, so only
+        # trust a row once the delimiter after it has arrived
+        if end is not None and end < len(text) and text[end] in _WHITESPACE + ",]":
+            yield row
+            text = text[end:]
+            continue
+        if finished:
+            raise Truncated()
+        try:
+            text += utf8.decode(next(chunks))
+        except StopIteration:
+            text += utf8.decode(b"", final = True)
+            finished = True
@@ -0,0 +1,237 @@
+"""A local stand-in for the SimilarWeb API that replays fixtures.
+
+The server answers the URLs the clients build with the JSON payloads in
+a fixtures directory laid out like `tests/fixtures` of a source
+checkout, so clients can be load tested and benchmarked without network
+or credits. The fixtures are not installed with the package, so the
+directory is always given. Point a client at it with `api_root =
+server.url`, or every client at once with the SIMILARWEB_API_ROOT
+environment variable.
+
+Every response can be delayed by `latency` seconds plus up to `jitter`
+more; a share `error_rate` of requests fails with a 503, and with a
+`rate` each user key may make that many requests per second (bursting
+to `burst`) before being answered 429 with a Retry-After header.
+Paginated endpoints serve `pages` pages, or as many as the fixture's
+TotalCount implies. Requests with the user key "invalid" get the
+fixture's invalid key payload.
+
+    $ python -m similarweb.stubserver --fixtures tests/fixtures --port 8000 --rate 20
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+# URL path segment -> fixture name prefix
+ENDPOINTS = {
+    "traffic": "traffic_client_traffic",
+    "visits": "traffic_client_visits",
+    "pageviews": "traffic_client_page_views",
+    "visitduration": "traffic_client_visit_duration",
+    "bouncerate": "traffic_client_bounce_rate",
+    "similarsites": "content_client_similar_sites",
+    "alsovisited": "content_client_also_visited",
+    "tags": "content_client_tags",
+    "category": "content_client_category",
+    "categoryrank": "content_client_category_rank",
+    "orgsearch": "sources_client_organic_search_keywords",
+    "orgkwcompetitor": "sources_client_organic_keyword_competitors",
+    "paidkwcompetitor": "sources_client_paid_keyword_competitors",
+    "paidsearch": "sources_client_paid_search_keywords",
+    "referrals": "sources_client_referrals",
+    "SocialReferringSites": "sources_client_social_referrals",
+    "leadingdestinationsites": "sources_client_destinations",
+    "GetAppDetails": "mobile_client_app_details",
+    "GetAppInstalls": "mobile_client_google_app_installs",
+    "GetRelatedSiteApps": "mobile_client_site_related_apps",
+}
+
+SITE_PATH = re.compile(r"^/Site/[^/]+/v[12]/(?P<endpoint>\w+)$")
+MOBILE_PATH = re.compile(r"^/Mobile/(?P<store>\d+)/[^/]+/v1/(?P<endpoint>\w+)$")
+
+NOT_FOUND = b'{"Message": "No HTTP resource was found that matches the request URI."}'
+UNAVAILABLE = b'{"Message": "Service Unavailable"}'
+THROTTLED = b'{"Message": "Too Many Requests"}'
+
+
+def load_fixtures(directory):
+    """Read every `*_response.json` in `directory` as bytes, by name."""
+    fixtures = {}
+    for name in os.listdir(directory):
+        if name.endswith("_response.json"):
+            with open(os.path.join(directory, name), "rb") as fixture_file:
+                fixtures[name[:-len("_response.json")]] = fixture_file.read()
+    return fixtures
+
+
+class _Throttle(object):
+    """Non-blocking per-key token buckets; `admit` returns the wait needed."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def admit(self, key):
+        with self._lock:
+            now = time.time()
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / self.rate
+            self._buckets[key] = (tokens - 1, now)
+            return 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        status, body, headers = self.server.respond(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, fixtures, host = "127.0.0.1", port = 0, latency = 0,
+                 jitter = 0, error_rate = 0, rate = None, burst = None,
+                 pages = None, seed = None):
+        HTTPServer.__init__(self, (host, port), StubHandler)
+        self.fixtures = load_fixtures(fixtures)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle = None
+        if rate is not None:
+            self.throttle = _Throttle(rate, burst or max(1, int(rate)))
+        self.pages = pages
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return "http://{0}:{1}".format(host, port)
+
+    def start(self):
+        """Serve from a background thread; returns the server."""
+        self._thread = threading.Thread(target = self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, path):
+        """Return the status, body and extra headers for a request path."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+
+        parts = urlsplit(path)
+        query = dict((k, v[0]) for k, v in parse_qs(parts.query).items())
+        if self.throttle is not None:
+            wait = self.throttle.admit(query.get("UserKey"))
+            if wait:
+                return 429, THROTTLED, [("Retry-After", str(int(math.ceil(wait))))]
+        if failed:
+            return 503, UNAVAILABLE, []
+
+        match = SITE_PATH.match(parts.path) or MOBILE_PATH.match(parts.path)
+        prefix = match and ENDPOINTS.get(match.group("endpoint"))
+        if not prefix:
+            return 404, NOT_FOUND, []
+        if query.get("UserKey") == "invalid":
+            for suffix in ("_invalid_api_key", "_invalid_user_key"):
+                if prefix + suffix in self.fixtures:
+                    return 400, self.fixtures[prefix + suffix], []
+
+        name = prefix + "_good"
+        if match.groupdict().get("store") == "1" and name + "_apple" in self.fixtures:
+            name += "_apple"
+        if "page" in query:
+            return self._page(prefix, parts.path, query)
+        return 200, self.fixtures[name], []
+
+    def _page(self, prefix, path, query):
+        payload = json.loads(self.fixtures[prefix + "_good"].decode("utf-8"))
+        per_page = payload.get("ResultsCount") or len(payload["Data"])
+        if self.pages is not None:
+            payload["TotalCount"] = self.pages * per_page
+        last = max(1, -(-payload["TotalCount"] // per_page))
+        try:
+            page = int(query["page"])
+        except ValueError:
+            page = 0
+        if not 1 <= page <= last:
+            return 400, self.fixtures[prefix + "_page_bad"], []
+
+        payload["Next"] = None
+        if page < last:
+            query["page"] = str(page + 1)
+            payload["Next"] = "{0}{1}?{2}".format(self.url, path, urlencode(query))
+        return 200, json.dumps(payload).encode("utf-8"), []
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8000)
+    parser.add_argument("--fixtures", required = True,
+                        help = "directory of *_response.json payloads")
+    parser.add_argument("--latency", type = float, default = 0)
+    parser.add_argument("--jitter", type = float, default = 0)
+    parser.add_argument("--error-rate", type = float, default = 0)
+    parser.add_argument("--rate", type = float)
+    parser.add_argument("--burst", type = int)
+    parser.add_argument("--pages", type = int)
+    parser.add_argument("--seed", type = int)
+    args = parser.parse_args(argv)
+
+    server = StubServer(args.fixtures, args.host, args.port, args.latency,
+                        args.jitter, args.error_rate, args.rate, args.burst,
+                        args.pages, args.seed)
+    print("Serving fixtures on {0}; export SIMILARWEB_API_ROOT={0}".format(server.url))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
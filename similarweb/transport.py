@@ -0,0 +1,164 @@
+import random
+import threading
+import time
+
+
+class RetryPolicy(object):
+    """When and how long to wait before re-sending a failed request.
+
+    Connection errors, timeouts and responses whose status is in
+    `statuses` are retried up to `max_attempts` attempts in total, and
+    never past `deadline` seconds after the first attempt. The wait
+    doubles from `backoff` up to `max_backoff` with full jitter, unless
+    the response carries a Retry-After header, which is honored.
+    """
+
+    def __init__(self, max_attempts = 3, backoff = 0.5, max_backoff = 30,
+                 jitter = True, deadline = 120,
+                 statuses = (429, 500, 502, 503, 504)):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+
+    def is_transient(self, response):
+        return response.status_code in self.statuses
+
+    def delay(self, attempt, response = None):
+        retry_after = None
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def next_delay(self, attempt, started, response = None):
+        """Seconds to wait before the next attempt; None if there is none."""
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.delay(attempt, response)
+        if self.deadline is not None and time.time() + delay - started > self.deadline:
+            return None
+        return delay
+
+    def wait(self, attempt, started, response = None):
+        """Sleep before the next attempt; False if there is none."""
+        delay = self.next_delay(attempt, started, response)
+        if delay is None:
+            return False
+        time.sleep(delay)
+        return True
+
+
+def parse_retry_after(value):
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+    try:
+        when = email.utils.parsedate_tz(value)
+        return max(0.0, email.utils.mktime_tz(when) - time.time())
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class Transport(object):
+    """Pooled keep-alive HTTP transport shared by the API clients.
+
+    Every client sends its requests through a Transport. Unless one is
+    passed to the client constructor they all share `default_transport()`,
+    so repeated calls to api.similarweb.com reuse open connections
+    instead of paying a fresh TCP+TLS handshake each time. Transient
+    failures are retried according to `retry`, a RetryPolicy; pass
+    `retry = None` to send every request exactly once. `pool_maxsize`
+    should be at least the number of threads sharing the Transport; the
+    default matches the default `max_workers` of the `_many` methods.
+    requests is imported when the first Transport is made.
+    """
+
+    def __init__(self, pool_connections = 10, pool_maxsize = 16,
+                 timeout = 30, keep_alive = True, retry = RetryPolicy()):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.retry = retry
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections = pool_connections,
+                              pool_maxsize = pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+
+    def get(self, url, stream = False, retry_throttled = True):
+        """GET `url`, retrying transient failures.
+
+        Returns the last response, with the number of attempts made in
+        its `attempts` attribute and the time its headers arrived in
+        `received`, or raises the last connection error or timeout once
+        the retry policy gives up. With `stream` the body is left unread
+        for the caller to consume with `iter_content`. With
+        `retry_throttled` False a 429 is returned at once, so a caller
+        holding several keys can send the request with another one.
+        """
+        import requests
+
+        started = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                # Reading the body ourselves separates its download from
+                # the wait for headers, as requests does without stream
+                response = self.session.get(url, timeout = self.timeout,
+                                            stream = True)
+                response.received = time.time()
+                if not stream:
+                    response.content
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError):
+                # ChunkedEncodingError: the connection dropped mid-body
+                if self.retry is None or not self.retry.wait(attempt, started):
+                    raise
+                continue
+            if (self.retry is None or not self.retry.is_transient(response) or
+                    (response.status_code == 429 and not retry_throttled) or
+                    not self.retry.wait(attempt, started, response)):
+                response.attempts = attempt
+                return response
+            response.close()
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def default_transport():
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = Transport()
+    return _default_transport
+
+
+def set_default_transport(transport):
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
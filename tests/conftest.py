@@ -0,0 +1,55 @@
+import json
+import os
+
+TD = os.path.dirname(os.path.realpath(__file__))
+FIXTURES = os.path.join(TD, "fixtures")
+
+
+def read_fixture(fixture):
+    with open("{0}/fixtures/{1}".format(TD, fixture), "rb") as data_file:
+        return data_file.read()
+
+
+class FakeResponse(object):
+    """A response read in full; `body` is encoded as JSON unless bytes."""
+
+    def __init__(self, body, status_code = 200, headers = None, attempts = 1):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.content = body
+        self.text = body.decode("utf-8")
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        self.attempts = attempts
+
+    def iter_content(self, chunk_size = 1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FixtureTransport(object):
+    """A transport answering every request with one fixture file."""
+
+    def __init__(self, fixture, status_code = 200, attempts = 1):
+        self.content = read_fixture(fixture)
+        self.status_code = status_code
+        self.attempts = attempts
+        self.urls = []
+
+    @property
+    def calls(self):
+        return len(self.urls)
+
+    def get(self, url, stream = False):
+        self.urls.append(url)
+        return FakeResponse(self.content, self.status_code,
+                            attempts = self.attempts)
+
+
+def client_for(client_class, fixture, attempts = 1, **options):
+    """A client whose every request is answered with `fixture`."""
+    return client_class("test_key", transport = FixtureTransport(fixture, attempts = attempts),
+                        single_flight = False, **options)
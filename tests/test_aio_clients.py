@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from similarweb import AsyncTrafficClient, AsyncContentClient, AsyncMobileClient
+from similarweb import KeyPool, RateLimiter, TrafficClient
+from similarweb import aio, helpers
+from similarweb.stubserver import StubServer
+
+from .conftest import FIXTURES, FakeResponse, read_fixture
+
+
+class AsyncFixtureTransport(object):
+    """An async transport answering every request with one fixture."""
+
+    errors = (OSError,)
+
+    def __init__(self, fixture, delay = 0):
+        self.content = read_fixture(fixture)
+        self.delay = delay
+        self.urls = []
+        self.in_flight = 0
+        self.peak = 0
+
+    async def get(self, url):
+        self.urls.append(url)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return FakeResponse(self.content)
+
+
+@pytest.fixture(scope = "module")
+def server():
+    pytest.importorskip("aiohttp")
+    with StubServer(FIXTURES) as stub:
+        yield stub
+
+
+def test_async_clients_share_one_default_transport():
+    pytest.importorskip("aiohttp")
+
+    async def open_two():
+        first = AsyncTrafficClient("test_key")
+        second = AsyncContentClient("test_key")
+        shared = first.transport is second.transport
+        await first.close()
+        await second.close()
+        return first, shared
+
+    client, shared = asyncio.run(open_two())
+    assert shared
+    assert isinstance(client.client, TrafficClient)
+    assert isinstance(client.transport, aio.AsyncTransport)
+    assert client.user_key == "test_key"
+
+
+def test_async_client_uses_injected_transport():
+    transport = AsyncFixtureTransport("traffic_client_visits_good_response.json")
+    client = AsyncTrafficClient("test_key", transport = transport)
+
+    assert client.transport is transport
+    asyncio.run(client.close())
+
+
+def test_async_traffic_client_visits_gathers_concurrent_requests(server):
+    expected = {"2014-11-01": 12897241, "2014-12-01": 13917811}
+
+    async def sweep():
+        async with AsyncTrafficClient("test_key", api_root = server.url) as client:
+            return await asyncio.gather(
+                client.visits("example.com", "monthly", "11-2014", "12-2014"),
+                client.visits("example.org", "monthly", "11-2014", "12-2014"))
+
+    assert asyncio.run(sweep()) == [expected, expected]
+
+
+def test_async_content_client_classifies_invalid_api_key(server):
+    expected = {"Error": "user_key_invalid"}
+
+    async def fetch():
+        async with AsyncContentClient("invalid", api_root = server.url) as client:
+            return await client.tags("example.com")
+
+    assert asyncio.run(fetch()) == expected
+
+
+def test_async_client_reports_unreachable_api():
+    pytest.importorskip("aiohttp")
+    transport = aio.AsyncTransport(retry = None)
+
+    async def fetch():
+        async with AsyncTrafficClient("test_key", transport = transport,
+                                      api_root = "http://127.0.0.1:1") as client:
+            result = await client.visits("example.com", "monthly", "11-2014", "12-2014")
+        await transport.close()
+        return result
+
+    assert asyncio.run(fetch()) == helpers.BAD_TRANSPORT
+
+
+def test_async_mobile_client_rejects_bad_app_store():
+    expected = {"Error": "App store must be 'apple' or 'google'"}
+    transport = AsyncFixtureTransport("mobile_client_app_details_good_response.json")
+
+    async def fetch():
+        async with AsyncMobileClient("test_key", transport = transport) as client:
+            return await client.app_details("123", "windows")
+
+    assert asyncio.run(fetch()) == expected
+    assert transport.urls == []
+
+
+def test_async_client_bounds_requests_on_the_wire():
+    transport = AsyncFixtureTransport("traffic_client_visits_good_response.json",
+                                 delay = 0.01)
+    domains = ["site{0}.com".format(i) for i in range(20)]
+
+    async def sweep():
+        async with AsyncTrafficClient("test_key", transport = transport,
+                                      max_concurrency = 4) as client:
+            return await asyncio.gather(*[
+                client.visits(domain, "monthly", "11-2014", "12-2014")
+                for domain in domains])
+
+    results = asyncio.run(sweep())
+    assert len(results) == 20
+    assert "Error" not in results[0]
+    assert transport.peak == 4
+
+
+def test_async_client_coalesces_identical_requests():
+    transport = AsyncFixtureTransport("traffic_client_visits_good_response.json",
+                                 delay = 0.01)
+
+    async def sweep():
+        async with AsyncTrafficClient("test_key", transport = transport) as client:
+            return await asyncio.gather(*[
+                client.visits("example.com", "monthly", "11-2014", "12-2014")
+                for _ in range(5)])
+
+    results = asyncio.run(sweep())
+    assert len(transport.urls) == 1
+    assert results[0] == results[4] and results[0] is not results[4]
+
+
+def test_async_client_rotates_pooled_keys_and_paces_requests():
+    transport = AsyncFixtureTransport("traffic_client_visits_good_response.json")
+    limiter = RateLimiter(rate = 1000, burst = 1, quota = 2)
+
+    async def sweep():
+        async with AsyncTrafficClient(KeyPool(["a", "b"]), transport = transport,
+                                      rate_limiter = limiter,
+                                      single_flight = False) as client:
+            return [await client.visits("example.com", "monthly", "11-2014", "12-2014")
+                    for _ in range(5)]
+
+    results = asyncio.run(sweep())
+    assert [url.rsplit("=", 1)[1] for url in transport.urls] == ["a", "b", "a", "b"]
+    assert results[4] == helpers.BAD_QUOTA_EXCEEDED
@@ -0,0 +1,175 @@
+import json
+import httpretty
+import os
+import pytest
+from similarweb import ContentClient, TrafficClient, MemoryCache, SqliteCache
+from similarweb import helpers
+
+TD = os.path.dirname(os.path.realpath(__file__))
+
+def test_request_key_ignores_user_key_and_parameter_order():
+    a = ("https://api.similarweb.com/Site/example.com/v1/visits?gr=monthly"
+         "&start=11-2014&end=12-2014&md=False&UserKey=key_one")
+    b = ("https://api.similarweb.com/Site/example.com/v1/visits?UserKey=key_two"
+         "&md=False&end=12-2014&start=11-2014&gr=monthly")
+
+    assert helpers.request_key(a) == helpers.request_key(b)
+    assert "key_one" not in helpers.request_key(a)
+
+
+def test_request_key_keeps_scheme_and_host():
+    path = "/Site/example.com/v1/visits?gr=monthly&UserKey=k"
+    production = helpers.request_key("https://api.similarweb.com" + path)
+
+    assert helpers.request_key("HTTPS://API.similarweb.com" + path) == production
+    assert helpers.request_key("http://127.0.0.1:8000" + path) != production
+
+
+def test_endpoint_name_is_last_path_segment():
+    url = "https://api.similarweb.com/Site/example.com/v2/similarsites?UserKey=k"
+
+    assert helpers.endpoint_name(url) == "similarsites"
+
+
+def test_memory_cache_counts_hits_and_misses():
+    cache = MemoryCache()
+    url = "https://api.similarweb.com/Site/example.com/v2/category?UserKey=k"
+
+    assert cache.get(url) is None
+    cache.set(url, {"Category": "Sports"})
+
+    assert cache.get(url) == {"Category": "Sports"}
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_size = 2)
+    urls = ["https://api.similarweb.com/Site/{0}/v2/category?UserKey=k".format(d)
+            for d in ["a.com", "b.com", "c.com"]]
+    cache.set(urls[0], {"Category": "A"})
+    cache.set(urls[1], {"Category": "B"})
+    cache.get(urls[0])
+    cache.set(urls[2], {"Category": "C"})
+
+    assert cache.get(urls[1]) is None
+    assert cache.get(urls[0]) == {"Category": "A"}
+    assert cache.evictions == 1
+
+
+def test_memory_cache_expires_entries_per_endpoint_ttl():
+    cache = MemoryCache(ttl = 3600, ttls = {"traffic": 0})
+    traffic_url = "https://api.similarweb.com/Site/a.com/v1/traffic?UserKey=k"
+    category_url = "https://api.similarweb.com/Site/a.com/v2/category?UserKey=k"
+    cache.set(traffic_url, {"GlobalRank": 1})
+    cache.set(category_url, {"Category": "A"})
+
+    assert cache.get(traffic_url) is None
+    assert cache.get(category_url) == {"Category": "A"}
+
+
+def test_memory_cache_ttls_are_keyed_by_method_name():
+    cache = MemoryCache(ttl = 3600, ttls = {"page_views": 0})
+    url = ("https://api.similarweb.com/Site/a.com/v1/pageviews?gr=monthly"
+           "&start=11-2014&end=12-2014&md=False&UserKey=k")
+    cache.set(url, {"Values": []})
+
+    assert cache.get(url) is None
+
+
+def test_cache_rejects_ttls_for_unknown_endpoints(tmpdir):
+    with pytest.raises(ValueError):
+        MemoryCache(ttls = {"pageviews": 60})
+    with pytest.raises(ValueError):
+        SqliteCache(str(tmpdir.join("responses.db")), ttls = {"visit": 60})
+
+
+def test_memory_cache_returns_copies():
+    cache = MemoryCache()
+    url = "https://api.similarweb.com/Site/a.com/v2/category?UserKey=k"
+    cache.set(url, {"Category": "A"})
+    cache.get(url)["Category"] = "mutated"
+
+    assert cache.get(url) == {"Category": "A"}
+
+
+@httpretty.activate
+def test_client_serves_repeated_requests_from_cache():
+    expected = {"2014-11-01": 12897241, "2014-12-01": 13917811}
+    target_url = ("https://api.similarweb.com/Site/"
+                  "example.com/v1/visits?gr=monthly&start=11-2014&end=12-2014"
+                  "&md=False&UserKey=test_key")
+    f = "{0}/fixtures/traffic_client_visits_good_response.json".format(TD)
+    with open(f) as data_file:
+        stringified = json.dumps(json.load(data_file))
+        httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+    cache = MemoryCache()
+    client = TrafficClient("test_key", cache = cache)
+    first = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+    second = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+
+    assert first == second == expected
+    assert len(httpretty.latest_requests()) == 1
+    assert cache.hits == 1
+
+
+@httpretty.activate
+def test_client_does_not_cache_api_errors():
+    target_url = ("https://api.similarweb.com/Site/"
+                  "example.com/v2/category?UserKey=invalid_key")
+    f = "{0}/fixtures/content_client_category_invalid_api_key_response.json".format(TD)
+    with open(f) as data_file:
+        stringified = json.dumps(json.load(data_file))
+        httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+    cache = MemoryCache()
+    client = ContentClient("invalid_key", cache = cache)
+    client.category("example.com")
+
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_persists_across_instances(tmpdir):
+    path = str(tmpdir.join("responses.db"))
+    url = "https://api.similarweb.com/Site/a.com/v2/category?UserKey=k"
+    SqliteCache(path).set(url, {"Category": "A"})
+    cache = SqliteCache(path)
+
+    assert cache.get(url) == {"Category": "A"}
+    assert cache.stats() == {"hits": 1, "misses": 0, "size": 1}
+
+
+def test_sqlite_cache_purges_expired_entries(tmpdir):
+    cache = SqliteCache(str(tmpdir.join("responses.db")), ttls = {"traffic": 0})
+    traffic_url = "https://api.similarweb.com/Site/a.com/v1/traffic?UserKey=k"
+    category_url = "https://api.similarweb.com/Site/a.com/v2/category?UserKey=k"
+    cache.set(traffic_url, {"GlobalRank": 1})
+    cache.set(category_url, {"Category": "A"})
+
+    assert cache.get(traffic_url) is None
+    assert cache.purge_expired() == 1
+    cache.vacuum()
+    assert len(cache) == 1
+
+
+def test_sqlite_cache_is_usable_from_other_threads(tmpdir):
+    import threading
+    cache = SqliteCache(str(tmpdir.join("responses.db")))
+    url = "https://api.similarweb.com/Site/a.com/v2/category?UserKey=k"
+    cache.set(url, {"Category": "A"})
+    results = []
+    t = threading.Thread(target = lambda: results.append(cache.get(url)))
+    t.start()
+    t.join()
+
+    assert results == [{"Category": "A"}]
+
+
+@httpretty.activate
+def test_offline_sqlite_cache_serves_stale_entries_without_network(tmpdir):
+    path = str(tmpdir.join("responses.db"))
+    url = "https://api.similarweb.com/Site/example.com/v2/category?UserKey=test_key"
+    SqliteCache(path, ttl = 0).set(url, {"Category": "Sports"})
+    client = ContentClient("test_key", cache = SqliteCache(path, offline = True))
+
+    assert client.category("example.com") == {"Category": "Sports"}
+    assert client.category("example.org") == {"Error": "Not available in offline cache"}
+    assert httpretty.latest_requests() == []
@@ -0,0 +1,56 @@
+import pytest
+from similarweb import ContentClient, MobileClient, TrafficClient
+from similarweb import helpers
+
+from .conftest import FixtureTransport
+
+numpy = pytest.importorskip("numpy")
+
+
+def test_columnar_builds_parallel_arrays():
+    items = [{"Date": "2014-11-01", "Value": 1}, {"Date": "2014-12-01", "Value": 2}]
+    dates, values = helpers.columnar(items, "Date", "Value",
+                                     keys_dtype = "datetime64[D]")
+
+    assert dates.dtype == numpy.dtype("datetime64[D]")
+    assert values.dtype == numpy.dtype("float64")
+    assert list(dates.astype(str)) == ["2014-11-01", "2014-12-01"]
+    assert list(values) == [1.0, 2.0]
+
+
+def test_traffic_client_visits_columnar_matches_dict_output():
+    transport = FixtureTransport("traffic_client_visits_good_response.json")
+    client = TrafficClient("test_key", transport = transport, single_flight = False)
+    as_dict = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+    dates, values = client.visits("example.com", "monthly", "11-2014",
+                                  "12-2014", False, columnar = True)
+
+    assert dict(zip(dates.astype(str), values)) == as_dict
+
+
+def test_content_client_similar_sites_columnar():
+    transport = FixtureTransport("content_client_similar_sites_good_response.json")
+    client = ContentClient("test_key", transport = transport, single_flight = False)
+    as_dict = client.similar_sites("example.com")
+    urls, scores = client.similar_sites("example.com", columnar = True)
+
+    assert urls.dtype == numpy.dtype(object)
+    assert scores.dtype == numpy.dtype("float64")
+    assert dict(zip(urls, scores)) == as_dict
+
+
+def test_mobile_client_site_related_apps_columnar_keeps_titles():
+    transport = FixtureTransport("mobile_client_site_related_apps_good_response.json")
+    client = MobileClient("test_key", transport = transport, single_flight = False)
+    as_dict = client.site_related_apps("google.com", "google")
+    app_ids, titles = client.site_related_apps("google.com", "google",
+                                               columnar = True)
+
+    assert dict(zip(app_ids, titles)) == as_dict
+
+
+def test_columnar_errors_are_still_dictionaries():
+    transport = FixtureTransport("content_client_tags_invalid_api_key_response.json")
+    client = ContentClient("invalid_key", transport = transport)
+
+    assert client.tags("example.com", columnar = True) == {"Error": "user_key_invalid"}
@@ -0,0 +1,52 @@
+import glob
+import json
+import os
+import pytest
+from similarweb import decoders
+
+TD = os.path.dirname(os.path.realpath(__file__))
+
+
+@pytest.fixture
+def restore_decoder():
+    name = decoders.current()
+    yield
+    decoders.use(name)
+
+
+def good_fixtures():
+    return sorted(glob.glob("{0}/fixtures/*_good_response.json".format(TD)))
+
+
+@pytest.mark.parametrize("name", decoders.available())
+def test_decoder_parses_fixture_bytes(name):
+    loads = decoders.load(name)[1]
+    for f in good_fixtures():
+        with open(f, "rb") as data_file:
+            body = data_file.read()
+
+        assert loads(body) == json.loads(body.decode("utf-8"))
+
+
+@pytest.mark.parametrize("name", decoders.available())
+def test_decoder_raises_value_error_on_malformed_body(name):
+    loads = decoders.load(name)[1]
+
+    with pytest.raises(ValueError):
+        loads(b"<html>Bad Gateway</html>")
+
+
+def test_stdlib_json_is_always_available():
+    assert decoders.available()[-1] == "json"
+
+
+def test_use_selects_decoder(restore_decoder):
+    decoders.use("json")
+
+    assert decoders.current() == "json"
+    assert decoders.loads(b'{"Category": "Sports"}') == {"Category": "Sports"}
+
+
+def test_use_rejects_unknown_decoder():
+    with pytest.raises(ValueError):
+        decoders.use("yaml")
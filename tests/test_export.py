@@ -0,0 +1,201 @@
+import os
+import pytest
+from similarweb import export
+
+TD = os.path.dirname(os.path.realpath(__file__))
+
+
+@pytest.fixture
+def parquet():
+    pytest.importorskip("pyarrow")
+    return pytest.importorskip("pyarrow.parquet")
+
+
+def test_time_series_rows_have_stable_schema(tmpdir, parquet):
+    import pyarrow
+
+    path = str(tmpdir.join("visits.parquet"))
+    with export.ParquetSink(path, "time_series") as sink:
+        sink.write("example.com", {"2014-11-01": 12897241, "2014-12-01": 13917811})
+
+    table = parquet.read_table(path)
+
+    assert table.schema.names == ["domain", "date", "value"]
+    assert table.schema.field("date").type == pyarrow.date32()
+    assert table.column("value").to_pylist() == [12897241.0, 13917811.0]
+    assert str(table.column("date").to_pylist()[0]) == "2014-11-01"
+
+
+def test_rows_are_written_in_row_groups(tmpdir, parquet):
+    path = str(tmpdir.join("scores.parquet"))
+    with export.ParquetSink(path, "scores", row_group_size = 2) as sink:
+        sink.write_many([("a.com", {"x.com": 0.9, "y.com": 0.8}),
+                         ("b.com", {"z.com": 0.7})])
+
+    parquet_file = parquet.ParquetFile(path)
+
+    assert parquet_file.metadata.num_row_groups == 2
+    assert sink.rows_written == 3
+    assert parquet_file.read().column("domain").to_pylist() == ["a.com", "a.com", "b.com"]
+
+
+def test_error_results_are_skipped_and_recorded(tmpdir, parquet):
+    path = str(tmpdir.join("keywords.parquet"))
+    error = {"Error": "Malformed or Unknown URL"}
+    with export.ParquetSink(path, "search_keywords") as sink:
+        sink.write("bad.com", error)
+        sink.write("example.com", {"Data": [{"SearchTerm": "example", "Visits": 0.5,
+                                             "Change": 0.1}]})
+
+    assert sink.errors == [("bad.com", error)]
+    assert parquet.read_table(path).to_pylist() == [
+        {"domain": "example.com", "search_term": "example", "visits": 0.5, "change": 0.1}]
+
+
+def test_to_arrow_accepts_streamed_rows(parquet):
+    table = export.to_arrow("keyword_competitors",
+                            [("example.com", {"Domain": "rival.com", "Score": 0.3})])
+
+    assert table.to_pylist() == [{"domain": "example.com", "competitor": "rival.com",
+                                  "score": 0.3}]
+
+
+def test_to_arrow_builds_the_table_from_record_batches(parquet):
+    results = [("a.com", {"2014-11-01": 1.0, "2014-12-01": 2.0}),
+               ("bad.com", {"Error": "Data not found"}),
+               ("b.com", {"2014-11-01": 3.0})]
+
+    table = export.to_arrow("time_series", results, batch_size = 2)
+
+    assert table.num_rows == 3
+    assert len(table.column("value").chunks) == 2
+    assert table.column("domain").to_pylist() == ["a.com", "a.com", "b.com"]
+    assert export.to_arrow("time_series", []).num_rows == 0
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        list(export.flatten("nonsense", {}))
+
+
+SCORES = [("a.com", {"x.com": 0.9}), ("b.com", {"y.com": 0.8}),
+          ("c.com", {"z.com": 0.7}), ("d.com", {"w.com": 0.6})]
+
+
+def test_csv_sink_writes_header_and_rows(tmpdir):
+    path = str(tmpdir.join("scores.csv"))
+    with export.CsvSink(path, "scores", buffer_size = 1) as sink:
+        sink.write_many(SCORES[:2])
+
+    with open(path) as csv_file:
+        assert csv_file.read() == "domain,key,score\na.com,x.com,0.9\nb.com,y.com,0.8\n"
+
+
+def test_jsonl_sink_gzip_output(tmpdir):
+    import gzip
+    import json
+
+    path = str(tmpdir.join("keywords.jsonl.gz"))
+    with export.JsonlSink(path, "search_keywords", compression = "gzip") as sink:
+        for row in [{"SearchTerm": "one", "Visits": 0.5, "Change": 0.1},
+                    {"SearchTerm": "two", "Visits": 0.25, "Change": None}]:
+            sink.write("example.com", row)
+        sink.write("bad.com", {"Error": "Malformed or Unknown URL"})
+
+    with gzip.open(path, "rt") as jsonl_file:
+        rows = [json.loads(line) for line in jsonl_file]
+
+    assert [row["search_term"] for row in rows] == ["one", "two"]
+    assert rows[1]["change"] is None
+    assert sink.errors == [("bad.com", {"Error": "Malformed or Unknown URL"})]
+
+
+INTERRUPTED_EXPORT = """
+import os, sys
+from similarweb import export
+sink = export.CsvSink(sys.argv[1], "scores", compression = sys.argv[3] or None,
+                      checkpoint = sys.argv[2], checkpoint_every = 2)
+sink.write_many({scores!r})
+sink.flush()
+sink._raw.flush()
+os._exit(1)
+"""
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_interrupted_export_resumes_from_checkpoint(tmpdir, compression):
+    import gzip
+    import subprocess
+    import sys
+
+    path = str(tmpdir.join("scores.csv"))
+    checkpoint = str(tmpdir.join("scores.checkpoint"))
+    # Rows of a domain finished after the last checkpoint reach the file
+    # before the process dies.
+    subprocess.call([sys.executable, "-c", INTERRUPTED_EXPORT.format(scores = SCORES),
+                     path, checkpoint, compression or ""],
+                    cwd = os.path.dirname(TD))
+
+    with export.CsvSink(path, "scores", compression = compression,
+                        checkpoint = checkpoint, checkpoint_every = 2,
+                        resume = True) as resumed:
+        resumed.write_many(SCORES)
+
+    assert resumed.rows_written == 2
+    opener = gzip.open if compression else open
+    with opener(path, "rt") as csv_file:
+        lines = csv_file.read().splitlines()
+    assert lines[0] == "domain,key,score"
+    assert [line.split(",")[0] for line in lines[1:]] == ["a.com", "b.com", "c.com", "d.com"]
+
+
+def test_domain_that_errors_mid_write_is_written_once_on_resume(tmpdir):
+    path = str(tmpdir.join("scores.csv"))
+    checkpoint = str(tmpdir.join("scores.checkpoint"))
+    sink = export.CsvSink(path, "scores", checkpoint = checkpoint, checkpoint_every = 1)
+    sink.write("d1.com", {"x.com": 0.1})
+    sink.write("d2.com", {"y.com": 1.0})
+    sink.write("d2.com", {"Error": "Data not found"})
+    sink.write("d3.com", {"z.com": 0.3})
+    sink.write("d4.com", {"w.com": 0.4})
+    sink.flush()
+
+    with export.CsvSink(path, "scores", checkpoint = checkpoint, checkpoint_every = 1,
+                        resume = True) as resumed:
+        resumed.write_many([("d2.com", {"y.com": 1.0}), ("d4.com", {"w.com": 0.4})])
+
+    assert sink.rows_written == 2
+    with open(path) as csv_file:
+        lines = csv_file.read().splitlines()
+    assert [line.split(",")[0] for line in lines[1:]] == ["d1.com", "d3.com", "d2.com",
+                                                         "d4.com"]
+
+
+def test_rows_after_a_domain_errors_are_dropped(tmpdir):
+    path = str(tmpdir.join("keywords.csv"))
+    checkpoint = str(tmpdir.join("keywords.checkpoint"))
+    with export.CsvSink(path, "search_keywords", checkpoint = checkpoint) as sink:
+        sink.write("a.com", {"SearchTerm": "p1", "Visits": 0.5, "Change": 0.1})
+        sink.write("a.com", {"Error": "Unknown Error"})
+        sink.write("a.com", {"SearchTerm": "p3", "Visits": 0.25, "Change": 0.1})
+        sink.write("b.com", {"SearchTerm": "b1", "Visits": 0.5, "Change": 0.1})
+
+    with open(path) as csv_file:
+        lines = csv_file.read().splitlines()
+    with open(checkpoint) as checkpoint_file:
+        checkpointed = checkpoint_file.read()
+
+    assert [line.split(",")[0] for line in lines[1:]] == ["b.com"]
+    assert "a.com" not in checkpointed and "b.com" in checkpointed
+    assert sink.rows_written == 1
+
+
+def test_zstd_compression(tmpdir):
+    zstandard = pytest.importorskip("zstandard")
+    path = str(tmpdir.join("scores.csv.zst"))
+    with export.CsvSink(path, "scores", compression = "zstd") as sink:
+        sink.write_many(SCORES)
+
+    with open(path, "rb") as zstd_file:
+        reader = zstandard.ZstdDecompressor().stream_reader(zstd_file)
+        assert reader.read().decode("utf-8").count("\n") == 5
@@ -0,0 +1,70 @@
+import pytest
+from similarweb import ContentClient, MobileClient, SourcesClient, TrafficClient
+
+from .conftest import client_for
+
+pandas = pytest.importorskip("pandas")
+
+
+def test_visits_frame_has_datetime_index():
+    client = client_for(TrafficClient, "traffic_client_visits_good_response.json")
+    frame = client.visits("example.com", "monthly", "11-2014", "12-2014",
+                          False, as_frame = True)
+
+    assert isinstance(frame.index, pandas.DatetimeIndex)
+    assert frame["Value"].dtype == "float64"
+    assert list(frame["Value"]) == [12897241, 13917811]
+    assert str(frame.index[0].date()) == "2014-11-01"
+
+
+def test_traffic_frame_splits_lists_into_tables():
+    client = client_for(TrafficClient, "traffic_client_traffic_good_response.json")
+    as_dict = client_for(TrafficClient, "traffic_client_traffic_good_response.json").traffic("example.com")
+    result = client.traffic("example.com", as_frame = True)
+
+    assert result["GlobalRank"] == as_dict["GlobalRank"]
+    assert list(result["TopCountryShares"].columns) == ["CountryCode", "TrafficShare"]
+    assert isinstance(result["TrafficReach"].index, pandas.DatetimeIndex)
+    assert len(result["TrafficReach"]) == len(as_dict["TrafficReach"])
+    assert dict(zip(result["TrafficShares"]["SourceType"],
+                    result["TrafficShares"]["SourceValue"])) == as_dict["TrafficShares"]
+
+
+def test_similar_sites_frame():
+    client = client_for(ContentClient, "content_client_similar_sites_good_response.json")
+    as_dict = client.similar_sites("example.com")
+    frame = client.similar_sites("example.com", as_frame = True)
+
+    assert dict(zip(frame["Url"], frame["Score"])) == as_dict
+
+
+def test_category_frame_is_one_row():
+    client = client_for(ContentClient, "content_client_category_rank_good_response.json")
+    frame = client.category_rank("example.com", as_frame = True)
+
+    assert frame.to_dict("records") == [{"Category": "Sports/Basketball",
+                                         "CategoryRank": 1}]
+
+
+def test_keyword_page_frame_has_data_rows():
+    client = client_for(SourcesClient, "sources_client_organic_search_keywords_good_response.json")
+    page = client.organic_search_keywords("example.com", 1, "11-2014", "12-2014",
+                                          as_frame = True)
+
+    assert list(page.columns) == ["SearchTerm", "Visits", "Change"]
+    assert len(page) == 10
+
+
+def test_destinations_frame():
+    client = client_for(SourcesClient, "sources_client_destinations_good_response.json")
+    frame = client.destinations("example.com", as_frame = True)
+
+    assert frame["Site"][0] == "ticketmaster.com"
+
+
+def test_app_details_frame_and_errors():
+    client = client_for(MobileClient, "mobile_client_app_details_good_response.json")
+    assert client.app_details("123", "google", as_frame = True)["Title"][0] == "Yahoo Mail"
+
+    client = client_for(MobileClient, "mobile_client_app_details_invalid_api_key_response.json")
+    assert client.app_details("123", "google", as_frame = True) == {"Error": "user_key_invalid"}
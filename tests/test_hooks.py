@@ -0,0 +1,154 @@
+import pytest
+from similarweb import Hooks, MemoryCache, Metrics, SourcesClient, TrafficClient
+from similarweb import helpers
+
+from .conftest import FixtureTransport, client_for
+
+
+class PlainTransport(FixtureTransport):
+    """A custom transport that only takes a URL."""
+
+    def get(self, url):
+        return FixtureTransport.get(self, url)
+
+
+class Span(object):
+    def __init__(self, name):
+        self.name = name
+        self.attributes = {}
+
+    def set_attribute(self, name, value):
+        self.attributes[name] = value
+
+
+class Tracer(object):
+    def __init__(self):
+        self.spans = []
+
+    def start_as_current_span(self, name):
+        tracer = self
+
+        class Context(object):
+            def __enter__(self):
+                tracer.spans.append(Span(name))
+                return tracer.spans[-1]
+
+            def __exit__(self, *exc_info):
+                return False
+        return Context()
+
+
+def test_hooks_run_around_each_round_trip():
+    events = []
+    hooks = Hooks(before_request = [lambda call: events.append(("before", call.status))],
+                  after_response = [lambda call: events.append(("after", call.status))],
+                  on_error = [lambda call: events.append(("error", call.result))])
+    transport = PlainTransport("traffic_client_visits_good_response.json")
+    client = TrafficClient("test_key", transport = transport, hooks = hooks)
+    client.visits("example.com", "monthly", "11-2014", "12-2014")
+
+    assert events == [("before", None), ("after", 200)]
+
+
+def test_call_describes_the_request():
+    calls = []
+    hooks = Hooks(after_response = [calls.append])
+    client = client_for(SourcesClient, "sources_client_referrals_good_response.json",
+                        attempts = 3, hooks = hooks)
+    client.referrals("example.com", 2, "11-2014", "12-2014")
+
+    call = calls[0]
+    assert call.endpoint == "referrals"
+    assert call.domain == "example.com"
+    assert call.page == 2
+    assert call.gr is None
+    assert call.attempts == 3
+    assert call.size == len(client.transport.content)
+    assert set(call.timings) == {"ttfb", "download", "decode", "classify"}
+
+
+def test_on_error_sees_classified_errors():
+    errors = []
+    hooks = Hooks(on_error = [errors.append])
+    client = client_for(TrafficClient, "traffic_client_visits_invalid_user_key_response.json",
+                        hooks = hooks)
+    client.visits("example.com", "monthly", "11-2014", "12-2014")
+
+    assert errors[0].result == helpers.BAD_API_KEY
+
+
+def test_on_error_sees_exceptions():
+    errors = []
+    hooks = Hooks(on_error = [errors.append])
+    client = client_for(TrafficClient, "traffic_client_visits_good_response.json",
+                        hooks = hooks)
+
+    def broken(*args):
+        raise RuntimeError("boom")
+    client._get = broken
+
+    with pytest.raises(RuntimeError):
+        client.visits("example.com", "monthly", "11-2014", "12-2014")
+    assert isinstance(errors[0].exception, RuntimeError)
+
+
+def test_tracer_gets_a_span_per_call():
+    tracer = Tracer()
+    client = client_for(TrafficClient, "traffic_client_visits_good_response.json",
+                        attempts = 2, hooks = Hooks(tracer = tracer))
+    client.visits("example.com", "daily", "11-2014", "12-2014")
+
+    span = tracer.spans[0]
+    assert span.name == "similarweb.visits"
+    assert span.attributes["similarweb.domain"] == "example.com"
+    assert span.attributes["similarweb.gr"] == "daily"
+    assert span.attributes["similarweb.retries"] == 1
+    assert span.attributes["http.status_code"] == 200
+    assert "similarweb.phase.ttfb" in span.attributes
+    assert "error" not in span.attributes
+
+
+def test_cached_calls_skip_request_hooks():
+    events = []
+    tracer = Tracer()
+    hooks = Hooks(before_request = [lambda call: events.append(call.endpoint)],
+                  tracer = tracer)
+    client = client_for(TrafficClient, "traffic_client_visits_good_response.json",
+                        hooks = hooks, cache = MemoryCache(), metrics = Metrics())
+    client.visits("example.com", "monthly", "11-2014", "12-2014")
+    client.visits("example.com", "monthly", "11-2014", "12-2014")
+
+    assert events == ["visits"]
+    assert tracer.spans[1].attributes["similarweb.cached"] is True
+    assert client.metrics.stats()["visits"]["cache_hits"] == 1
+
+
+def test_streamed_calls_run_hooks_while_the_rows_are_read():
+    events = []
+    tracer = Tracer()
+    hooks = Hooks(before_request = [lambda call: events.append("before")],
+                  after_response = [lambda call: events.append(("after", call.size))],
+                  tracer = tracer)
+    client = client_for(SourcesClient, "sources_client_referrals_good_response.json",
+                        hooks = hooks)
+    transport = client.transport
+    rows = client.referrals("example.com", 1, "11-2014", "12-2014", stream = True)
+
+    assert events == []
+    assert len(list(rows)) == 10
+    assert events == ["before", ("after", len(transport.content))]
+    span = tracer.spans[0]
+    assert span.name == "similarweb.referrals"
+    assert span.attributes["similarweb.domain"] == "example.com"
+    assert span.attributes["http.status_code"] == 200
+    assert "similarweb.phase.download" in span.attributes
+
+
+def test_streamed_calls_report_error_rows():
+    errors = []
+    client = client_for(SourcesClient, "sources_client_referrals_invalid_api_key_response.json",
+                        hooks = Hooks(on_error = [errors.append]))
+    rows = list(client.referrals("example.com", 1, "11-2014", "12-2014", stream = True))
+
+    assert errors[0].result == rows[-1]
+    assert "Error" in rows[-1]
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+
+def modules_after(statement):
+    script = "import sys; {0}; print(' '.join(sorted(sys.modules)))".format(statement)
+    output = subprocess.check_output([sys.executable, "-c", script], cwd = ROOT)
+    return set(output.decode("utf-8").split())
+
+
+def test_import_defers_heavy_dependencies():
+    loaded = modules_after("import similarweb")
+
+    for module in ("requests", "urllib3", "asyncio", "sqlite3",
+                   "concurrent.futures", "email.utils", "simplejson"):
+        assert module not in loaded
+
+
+def test_first_transport_loads_requests():
+    assert "requests" in modules_after("import similarweb; similarweb.Transport()")
+
+
+def test_async_clients_load_on_first_access():
+    loaded = modules_after("from similarweb import AsyncTrafficClient")
+
+    assert "similarweb.aio" in loaded
+    assert "asyncio" in loaded
@@ -0,0 +1,110 @@
+import json
+import httpretty
+from similarweb import ContentClient, KeyPool, RateLimiter, Transport
+from similarweb.transport import RetryPolicy
+
+from .conftest import FakeResponse
+from similarweb import helpers
+
+
+class KeyedTransport(object):
+    """Answers category requests, rejecting or throttling some keys."""
+
+    def __init__(self, invalid = (), throttled = ()):
+        self.invalid = invalid
+        self.throttled = throttled
+        self.keys = []
+
+    def get(self, url):
+        key = url.split("UserKey=")[1]
+        self.keys.append(key)
+        if key in self.invalid:
+            return FakeResponse({"Error": {"Message": "user_key_invalid", "Code": 400}})
+        if key in self.throttled:
+            return FakeResponse({}, status_code = 429)
+        return FakeResponse({"Category": "Sports"})
+
+
+def test_with_user_key_replaces_only_the_key():
+    url = "https://api.similarweb.com/Site/a.com/v1/visits?gr=monthly&UserKey=pooled&md=False"
+
+    assert helpers.with_user_key(url, "abc") == (
+        "https://api.similarweb.com/Site/a.com/v1/visits?gr=monthly&UserKey=abc&md=False")
+
+
+def test_key_pool_rotates_round_robin():
+    transport = KeyedTransport()
+    client = ContentClient(KeyPool(["a", "b", "c"]), transport = transport)
+    for _ in range(4):
+        client.category("example.com")
+
+    assert transport.keys == ["a", "b", "c", "a"]
+    assert client.full_url.endswith("UserKey=a")
+
+
+def test_key_pool_least_used_prefers_idle_keys():
+    pool = KeyPool(["a", "b"], strategy = "least_used")
+    pool.acquire()
+    pool.acquire()
+    pool.acquire()
+
+    assert pool.usage()["a"]["requests"] == 2
+    assert pool.usage()["b"]["requests"] == 1
+
+
+def test_key_pool_drops_invalid_keys_and_resends():
+    transport = KeyedTransport(invalid = ["a"])
+    pool = KeyPool(["a", "b"])
+    client = ContentClient(pool, transport = transport)
+
+    assert client.category("example.com") == {"Category": "Sports"}
+    assert client.category("example.com") == {"Category": "Sports"}
+    assert transport.keys == ["a", "b", "b"]
+    assert pool.usage()["a"]["status"] == "invalid"
+
+
+def test_key_pool_rests_throttled_keys():
+    transport = KeyedTransport(throttled = ["a"])
+    pool = KeyPool(["a", "b"], cooldown = 60)
+    client = ContentClient(pool, transport = transport)
+
+    assert client.category("example.com") == {"Category": "Sports"}
+    assert pool.usage()["a"]["status"] == "throttled"
+    assert pool.usage()["b"]["status"] == "active"
+
+
+@httpretty.activate
+def test_key_pool_rotates_a_throttled_key_without_retrying_it():
+    def respond(request, uri, headers):
+        if "UserKey=a" in uri:
+            return 429, headers, "{}"
+        return 200, headers, json.dumps({"Category": "Sports"})
+
+    httpretty.register_uri(httpretty.GET,
+                           "https://api.similarweb.com/Site/example.com/v2/category",
+                           body = respond)
+    transport = Transport(retry = RetryPolicy(max_attempts = 5, backoff = 60))
+    pool = KeyPool(["a", "b"], cooldown = 60)
+    client = ContentClient(pool, transport = transport, single_flight = False)
+
+    assert client.category("example.com") == {"Category": "Sports"}
+    assert [r.querystring["UserKey"] for r in httpretty.latest_requests()] == [
+        ["a"], ["b"]]
+    assert pool.usage()["a"]["status"] == "throttled"
+
+
+def test_key_pool_reports_when_every_key_is_invalid():
+    transport = KeyedTransport(invalid = ["a", "b"])
+    client = ContentClient(KeyPool(["a", "b"]), transport = transport)
+
+    assert client.category("example.com") == {"Error": "user_key_invalid"}
+
+
+def test_key_pool_aggregates_per_key_quotas():
+    limiter = RateLimiter(rate = 1000, burst = 1000, quota = 1)
+    client = ContentClient(KeyPool(["a", "b"]), transport = KeyedTransport(),
+                           rate_limiter = limiter)
+    results = [client.category("example.com") for _ in range(3)]
+
+    assert results[:2] == [{"Category": "Sports"}] * 2
+    assert results[2] == {"Error": "Client-side quota for this API key is spent"}
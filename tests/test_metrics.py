@@ -0,0 +1,110 @@
+from similarweb import MemoryCache, Metrics, SourcesClient, TrafficClient
+from similarweb import helpers
+
+from .conftest import client_for
+
+
+def test_requests_are_counted_per_endpoint_method():
+    metrics = Metrics()
+    client = client_for(TrafficClient, "traffic_client_page_views_good_response.json",
+                        metrics = metrics)
+    client.page_views("example.com", "monthly", "11-2014", "12-2014")
+    client.page_views("example.com", "monthly", "11-2014", "12-2014")
+
+    stats = metrics.stats()["page_views"]
+
+    assert stats["requests"] == 2
+    assert stats["bytes"] == 2 * len(client.transport.content)
+    assert stats["latency"]["count"] == 2
+    assert stats["latency"]["buckets"]["+Inf"] == 2
+    assert stats["outcomes"] == {"ok": 2}
+
+
+def test_classified_errors_are_counted_by_message():
+    metrics = Metrics()
+    client = client_for(TrafficClient, "traffic_client_visits_invalid_user_key_response.json",
+                        metrics = metrics)
+    client.visits("example.com", "monthly", "11-2014", "12-2014")
+
+    assert metrics.stats()["visits"]["outcomes"] == {helpers.BAD_API_KEY["Error"]: 1}
+
+
+def test_cache_hits_are_counted_without_a_request():
+    metrics = Metrics()
+    client = client_for(SourcesClient, "sources_client_social_referrals_good_response.json",
+                        metrics = metrics, cache = MemoryCache())
+    client.social_referrals("example.com")
+    client.social_referrals("example.com")
+
+    stats = metrics.stats()["social_referrals"]
+
+    assert client.transport.calls == 1
+    assert stats["requests"] == 1
+    assert stats["cache_hits"] == 1
+    assert stats["outcomes"] == {"ok": 2}
+
+
+def streaming_client(cut = None, **options):
+    client = client_for(SourcesClient, "sources_client_referrals_good_response.json",
+                        **options)
+    client.transport.content = client.transport.content[:cut]
+    return client
+
+
+def test_streamed_calls_are_counted_once_read():
+    metrics = Metrics()
+    client = streaming_client(metrics = metrics)
+    rows = client.referrals("example.com", 1, "11-2014", "12-2014", stream = True)
+
+    assert metrics.stats() == {}
+    list(rows)
+    stats = metrics.stats()["referrals"]
+
+    assert stats["requests"] == 1
+    assert stats["bytes"] == len(client.transport.content)
+    assert stats["latency"]["count"] == 1
+    assert stats["outcomes"] == {"ok": 1}
+
+
+def test_streams_that_fail_midway_are_counted_as_errors():
+    metrics = Metrics()
+    client = streaming_client(cut = 200, metrics = metrics)
+    rows = list(client.referrals("example.com", 1, "11-2014", "12-2014", stream = True))
+    stats = metrics.stats()["referrals"]
+
+    assert rows[-1] == helpers.BAD_TRANSPORT
+    assert stats["bytes"] == 200
+    assert stats["outcomes"] == {helpers.BAD_TRANSPORT["Error"]: 1}
+
+
+def test_latency_lands_in_the_matching_bucket():
+    metrics = Metrics()
+    metrics.request("visits", 0.2, 10)
+
+    buckets = metrics.stats()["visits"]["latency"]["buckets"]
+
+    assert buckets["0.1"] == 0
+    assert buckets["0.25"] == 1
+    assert buckets["+Inf"] == 1
+
+
+def test_prometheus_text_format():
+    metrics = Metrics()
+    metrics.request("visits", 0.02, 512)
+    metrics.outcome("visits", {"Error": 'say "hi"'})
+
+    text = metrics.prometheus()
+
+    assert "# TYPE similarweb_request_duration_seconds histogram" in text
+    assert 'similarweb_requests_total{endpoint="visits"} 1' in text
+    assert 'similarweb_request_duration_seconds_bucket{endpoint="visits",le="0.025"} 1' in text
+    assert 'similarweb_request_duration_seconds_bucket{endpoint="visits",le="0.01"} 0' in text
+    assert 'similarweb_response_bytes_total{endpoint="visits"} 512' in text
+    assert 'similarweb_outcomes_total{endpoint="visits",outcome="say \\"hi\\""} 1' in text
+
+
+def test_clients_without_metrics_record_nothing():
+    client = client_for(TrafficClient, "traffic_client_visits_good_response.json")
+
+    assert client.metrics is None
+    assert client.visits("example.com", "monthly", "11-2014", "12-2014")
@@ -311,3 +311,11 @@ def test_mobile_client_site_related_apps_response_from_good_inputs_apple():
 
         assert result == expected
 
+
+
+def test_mobile_client_app_details_many_rejects_bad_app_store():
+    expected = {"Error": "App store must be 'apple' or 'google'"}
+    client = MobileClient("test_key")
+    results = dict(client.app_details_many(["123", "456"], "windows"))
+
+    assert results == {"123": expected, "456": expected}
@@ -0,0 +1,63 @@
+import time
+from similarweb import ContentClient, MobileClient, RateLimiter
+from similarweb.ratelimit import TokenBucket, QuotaLedger
+
+from .conftest import FakeResponse
+
+
+class CategoryTransport(object):
+    def get(self, url):
+        return FakeResponse({"Category": "Sports"})
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate = 100, burst = 3)
+    waits = [bucket.acquire() for _ in range(5)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert 0 < waits[3] <= 0.011
+    assert waits[4] > 0
+
+
+def test_quota_ledger_counts_per_endpoint_and_caps_spend():
+    ledger = QuotaLedger(limit = 3)
+
+    assert ledger.charge("key", "visits")
+    assert ledger.charge("key", "visits")
+    assert ledger.charge("key", "traffic")
+    assert not ledger.charge("key", "traffic")
+    assert ledger.charge("other_key", "traffic")
+    assert ledger.usage("key") == {"visits": 2, "traffic": 1}
+    assert ledger.remaining("key") == 0
+
+
+def test_rate_limiter_is_shared_across_clients():
+    limiter = RateLimiter(rate = 1000, burst = 1000, quota = 2)
+    content_client = ContentClient("test_key", transport = CategoryTransport(),
+                                   rate_limiter = limiter)
+    other_client = ContentClient("test_key", transport = CategoryTransport(),
+                                 rate_limiter = limiter)
+
+    assert content_client.category("a.com") == {"Category": "Sports"}
+    assert other_client.category_rank("b.com") == {"Category": "Sports"}
+    assert content_client.category("c.com") == {"Error": "Client-side quota for this API key is spent"}
+    assert limiter.ledger.usage("test_key") == {"category": 1, "categoryrank": 1}
+
+
+def test_rate_limiter_paces_requests():
+    limiter = RateLimiter(rate = 50, burst = 1)
+    client = ContentClient("test_key", transport = CategoryTransport(),
+                           rate_limiter = limiter)
+    started = time.time()
+    for domain in ["a.com", "b.com", "c.com"]:
+        client.category(domain)
+
+    assert time.time() - started >= 0.035
+
+
+def test_rate_limiter_is_not_charged_for_local_rejections():
+    limiter = RateLimiter(quota = 1)
+    client = MobileClient("test_key", rate_limiter = limiter)
+    client.app_details("123", "windows")
+
+    assert limiter.ledger.total("test_key") == 0
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from similarweb import AsyncContentClient, ContentClient
+from similarweb.aio import AsyncSingleFlight
+from similarweb.singleflight import SingleFlight
+
+from .conftest import FakeResponse
+
+
+class SlowTransport(object):
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url):
+        self.calls += 1
+        time.sleep(0.1)
+        return FakeResponse({"Category": "Sports", "Rank": 1})
+
+
+class AsyncSlowTransport(SlowTransport):
+    errors = ()
+
+    async def get(self, url):
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return FakeResponse({"Category": "Sports", "Rank": 1})
+
+
+def run_in_threads(fn, count):
+    results = []
+    threads = [threading.Thread(target = lambda: results.append(fn()))
+               for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    group = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": [1, 2]}
+
+    results = run_in_threads(lambda: group.do("key", fn), 5)
+
+    assert len(calls) == 1
+    assert results == [{"value": [1, 2]}] * 5
+    assert len(set(id(r) for r in results)) == 5
+    assert group.coalesced == 4
+
+
+def test_single_flight_passes_errors_to_every_waiter():
+    group = SingleFlight()
+    errors = []
+
+    def fn():
+        time.sleep(0.1)
+        raise IOError("connection reset")
+
+    def call():
+        try:
+            group.do("key", fn)
+        except IOError as e:
+            errors.append(e)
+
+    run_in_threads(call, 3)
+
+    assert len(errors) == 3
+
+
+def test_concurrent_identical_client_calls_share_one_request():
+    transport = SlowTransport()
+    client = ContentClient("test_key", transport = transport,
+                           single_flight = SingleFlight())
+    results = run_in_threads(lambda: client.category("bigsite.com"), 8)
+
+    assert transport.calls == 1
+    assert results == [{"Category": "Sports", "Rank": 1}] * 8
+
+
+def test_single_flight_can_be_disabled():
+    transport = SlowTransport()
+    client = ContentClient("test_key", transport = transport,
+                           single_flight = False)
+    run_in_threads(lambda: client.category("bigsite.com"), 3)
+
+    assert transport.calls == 3
+
+
+def test_async_identical_calls_share_one_request():
+    transport = AsyncSlowTransport()
+
+    async def sweep():
+        async with AsyncContentClient("test_key", transport = transport,
+                                      single_flight = AsyncSingleFlight()) as client:
+            return await asyncio.gather(*[client.category("bigsite.com")
+                                          for _ in range(8)])
+
+    assert asyncio.run(sweep()) == [{"Category": "Sports", "Rank": 1}] * 8
+    assert transport.calls == 1
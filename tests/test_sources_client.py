@@ -1213,3 +1213,112 @@ def test_sources_client_paid_keyword_competitors_response_from_good_inputs():
 
         assert result == expected
 
+
+
+def register_keyword_pages(endpoint, total_count, pages):
+    f = "{0}/fixtures/sources_client_organic_search_keywords_good_response.json".format(TD)
+    with open(f) as data_file:
+        rows = json.load(data_file)["Data"]
+    for page in range(1, pages + 1):
+        target_url = ("https://api.similarweb.com/Site/"
+                      "example.com/v1/{0}?start=11-2014&end=12-2014"
+                      "&md=False&page={1}&UserKey=test_key").format(endpoint, page)
+        body = {"Data": [dict(r, Page = page) for r in rows],
+                "ResultsCount": len(rows),
+                "TotalCount": total_count}
+        httpretty.register_uri(httpretty.GET, target_url,
+                               body=json.dumps(body), match_querystring=True)
+    return len(rows)
+
+
+@httpretty.activate
+def test_sources_client_iter_organic_search_keywords_streams_every_page():
+    per_page = register_keyword_pages("orgsearch", 45, 5)
+    client = SourcesClient("test_key")
+    rows = list(client.iter_organic_search_keywords("example.com", "11-2014",
+                                                    "12-2014", False,
+                                                    window = 2))
+
+    assert len(rows) == 5 * per_page
+    assert [r["Page"] for r in rows] == sorted(r["Page"] for r in rows)
+
+
+@httpretty.activate
+def test_sources_client_iter_organic_search_keywords_yields_first_page_error():
+    expected = {"Error": "user_key_invalid"}
+    target_url = ("https://api.similarweb.com/Site/"
+                  "example.com/v1/orgsearch?start=11-2014&end=12-2014"
+                  "&md=False&page=1&UserKey=invalid_key")
+    f = "{0}/fixtures/sources_client_organic_search_keywords_invalid_api_key_response.json".format(TD)
+    with open(f) as data_file:
+        stringified = json.dumps(json.load(data_file))
+        httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+    client = SourcesClient("invalid_key")
+    rows = list(client.iter_organic_search_keywords("example.com", "11-2014",
+                                                    "12-2014", False))
+
+    assert rows == [expected]
+
+
+@httpretty.activate
+def test_sources_client_referrals_stream_yields_rows():
+    target_url = ("https://api.similarweb.com/Site/"
+                  "example.com/v1/referrals?start=11-2014&end=12-2014"
+                  "&page=1&UserKey=test_key")
+    f = "{0}/fixtures/sources_client_referrals_good_response.json".format(TD)
+    with open(f) as data_file:
+        page = json.load(data_file)
+        expected = page["Data"]
+        httpretty.register_uri(httpretty.GET, target_url, body=json.dumps(page))
+    client = SourcesClient("test_key")
+    rows = client.referrals("example.com", 1, "11-2014", "12-2014", stream = True)
+
+    assert list(rows) == expected
+
+
+@httpretty.activate
+def test_sources_client_organic_search_keywords_stream_classifies_errors():
+    expected = {"Error": "user_key_invalid"}
+    target_url = ("https://api.similarweb.com/Site/"
+                  "example.com/v1/orgsearch?start=11-2014&end=12-2014"
+                  "&md=False&page=1&UserKey=invalid_key")
+    f = "{0}/fixtures/sources_client_organic_search_keywords_invalid_api_key_response.json".format(TD)
+    with open(f) as data_file:
+        stringified = json.dumps(json.load(data_file))
+        httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+    client = SourcesClient("invalid_key")
+    rows = client.organic_search_keywords("example.com", 1, "11-2014",
+                                          "12-2014", False, stream = True)
+
+    assert list(rows) == [expected]
+
+
+def test_sources_client_stream_reports_a_truncated_body():
+    from similarweb import helpers
+    from .conftest import FakeResponse
+
+    class TruncatedTransport(object):
+        def get(self, url, stream = False):
+            return FakeResponse(b'{"Data": [{"Site": "a.com"}, {"Site": "b.com"}, {"Si')
+
+    client = SourcesClient("test_key", transport = TruncatedTransport())
+    rows = list(client.referrals("example.com", 1, "11-2014", "12-2014",
+                                 stream = True))
+
+    assert rows == [{"Site": "a.com"}, {"Site": "b.com"}, helpers.BAD_TRANSPORT]
+
+
+def test_sources_client_stream_uses_the_cache(tmpdir):
+    from similarweb import SqliteCache, helpers
+
+    path = str(tmpdir.join("responses.db"))
+    url = ("https://api.similarweb.com/Site/example.com/v1/referrals"
+           "?start=11-2014&end=12-2014&page=1&UserKey=test_key")
+    SqliteCache(path).set(url, {"Data": [{"Site": "a.com"}]})
+    client = SourcesClient("test_key", cache = SqliteCache(path, offline = True))
+
+    cached = client.referrals("example.com", 1, "11-2014", "12-2014", stream = True)
+    missing = client.referrals("example.com", 2, "11-2014", "12-2014", stream = True)
+
+    assert list(cached) == [{"Site": "a.com"}]
+    assert list(missing) == [helpers.BAD_OFFLINE_MISS]
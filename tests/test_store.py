@@ -0,0 +1,108 @@
+import pytest
+from similarweb import TrafficClient, MemorySeriesStore, SqliteSeriesStore
+
+from .conftest import FakeResponse
+
+
+class MonthlyTransport(object):
+    """Answers visits requests with one value per month in the window."""
+
+    def __init__(self):
+        self.urls = []
+
+    def get(self, url):
+        self.urls.append(url)
+        params = dict(p.split("=") for p in url.split("?")[1].split("&"))
+        start_month, start_year = [int(x) for x in params["start"].split("-")]
+        end_month, end_year = [int(x) for x in params["end"].split("-")]
+        values = []
+        year, month = start_year, start_month
+        while (year, month) <= (end_year, end_month):
+            values.append({"Date": "{0}-{1:02d}-01".format(year, month),
+                           "Value": year * 100 + month})
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return FakeResponse({"Values": values})
+
+
+@pytest.fixture(params = ["memory", "sqlite"])
+def store(request, tmpdir):
+    if request.param == "memory":
+        return MemorySeriesStore()
+    return SqliteSeriesStore(str(tmpdir.join("series.db")))
+
+
+def test_store_tracks_first_and_last_date(store):
+    assert store.last_date("example.com", "visits", "monthly", False) is None
+    assert store.first_date("example.com", "visits", "monthly", False) is None
+    store.append("example.com", "visits", "monthly", False,
+                 {"2014-11-01": 1, "2014-12-01": 2})
+
+    assert store.first_date("example.com", "visits", "monthly", False) == "2014-11-01"
+    assert store.last_date("example.com", "visits", "monthly", False) == "2014-12-01"
+    assert store.last_date("example.com", "visits", "monthly", True) is None
+
+
+def test_refresh_requests_only_the_missing_tail(store):
+    transport = MonthlyTransport()
+    client = TrafficClient("test_key", transport = transport)
+    client.refresh(store, "visits", "example.com", "monthly", "1-2014", "6-2014")
+    result = client.refresh(store, "visits", "example.com", "monthly",
+                            "1-2014", "8-2014")
+
+    assert "start=6-2014&end=8-2014" in transport.urls[1]
+    assert list(result.items())[0] == ("2014-01-01", 201401)
+    assert list(result.items())[-1] == ("2014-08-01", 201408)
+    assert len(result) == 8
+
+
+def test_refresh_requests_the_missing_head(store):
+    transport = MonthlyTransport()
+    client = TrafficClient("test_key", transport = transport)
+    client.refresh(store, "visits", "example.com", "monthly", "1-2014", "6-2014")
+    result = client.refresh(store, "visits", "example.com", "monthly",
+                            "1-2012", "8-2014")
+
+    assert "start=1-2012&end=1-2014" in transport.urls[1]
+    assert "start=6-2014&end=8-2014" in transport.urls[2]
+    assert list(result.items())[0] == ("2012-01-01", 201201)
+    assert len(result) == 32
+    assert store.first_date("example.com", "visits", "monthly", False) == "2012-01-01"
+
+
+def test_refresh_returns_request_errors(store):
+    class BrokenTransport(object):
+        def get(self, url):
+            return FakeResponse({"Error": "user_key_invalid"})
+
+    client = TrafficClient("invalid_key", transport = BrokenTransport())
+    result = client.refresh(store, "visits", "example.com", "monthly",
+                            "1-2014", "6-2014")
+
+    assert result == {"Error": "user_key_invalid"}
+    assert store.last_date("example.com", "visits", "monthly", False) is None
+
+
+def test_refresh_lets_the_api_report_bad_ranges(store):
+    class RangeTransport(object):
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url):
+            self.urls.append(url)
+            if "start=12-2014" in url:
+                return FakeResponse({"Message": "Date range is not valid"})
+            return FakeResponse(
+                {"Message": "The request is invalid.",
+                 "ModelState": {"Start": ["The value 'soon' is not valid for Start."]}})
+
+    transport = RangeTransport()
+    client = TrafficClient("test_key", transport = transport)
+    out_of_order = client.refresh(store, "visits", "example.com", "monthly",
+                                  "12-2014", "9-2014")
+    unparseable = client.refresh(store, "visits", "example.com", "monthly",
+                                 "soon", "9-2014")
+
+    assert out_of_order == {"Error": "Date range is not valid"}
+    assert unparseable == {"Error": "The value 'soon' is not valid for Start."}
+    assert len(transport.urls) == 2
+    assert store.last_date("example.com", "visits", "monthly", False) is None
@@ -0,0 +1,79 @@
+import json
+import os
+import pytest
+from similarweb import streaming
+
+TD = os.path.dirname(os.path.realpath(__file__))
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 64, 1 << 20])
+def test_iter_rows_matches_full_parse_for_any_chunk_size(size):
+    f = "{0}/fixtures/sources_client_organic_search_keywords_good_response.json".format(TD)
+    with open(f, "rb") as data_file:
+        body = data_file.read()
+
+    assert list(streaming.iter_rows(chunked(body, size))) == json.loads(body.decode("utf-8"))["Data"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 1024])
+def test_iter_rows_handles_tricky_values(size):
+    body = u'{"Next": "x\\"Data\\":[", "Data" : [1, 2.5, {"a": "]"}, "é"]}'.encode("utf-8")
+
+    assert list(streaming.iter_rows(chunked(body, size))) == [1, 2.5, {"a": "]"}, u"é"]
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_iter_rows_scans_a_large_prefix_once(size):
+    body = json.dumps({"Blob": "x\\\"" * 50000, "Nested": {"Data": [0]},
+                       "Data": [1, 2]}).encode("utf-8")
+    chunks = chunked(body, size)
+
+    assert list(streaming.iter_rows(chunks)) == [1, 2]
+
+
+def test_iter_rows_does_not_keep_a_large_body_without_the_array():
+    body = json.dumps({"Blob": "x" * (1 << 17)}).encode("utf-8")
+
+    with pytest.raises(streaming.NotAPage) as e:
+        list(streaming.iter_rows(chunked(body, 1024)))
+
+    assert e.value.response is None
+
+
+def test_iter_rows_is_lazy():
+    chunks = iter([b'{"Data": [{"a": 1}, ', b'{"a": 2}', b']}'])
+    rows = streaming.iter_rows(chunks)
+
+    assert next(rows) == {"a": 1}
+    assert next(chunks) == b'{"a": 2}'
+
+
+def test_iter_rows_raises_with_payload_when_there_is_no_array():
+    with pytest.raises(streaming.NotAPage) as e:
+        list(streaming.iter_rows([b'{"Message": "Data Not Found"}']))
+
+    assert e.value.response == {"Message": "Data Not Found"}
+
+
+def test_iter_rows_raises_without_payload_for_non_json():
+    with pytest.raises(streaming.NotAPage) as e:
+        list(streaming.iter_rows([b"<html>Bad Gateway</html>"]))
+
+    assert e.value.response is None
+
+
+@pytest.mark.parametrize("body, complete", [
+    (b'{"Data": [{"a": 1}, {"a": 2}, {"a": 3', 2),
+    (b'{"Data": [1.5, 2.5, 3', 2),
+    (b'{"Data": [1, 2', 1)])
+def test_iter_rows_raises_when_the_body_ends_inside_the_array(body, complete):
+    rows = []
+    with pytest.raises(streaming.Truncated):
+        for row in streaming.iter_rows(chunked(body, 4)):
+            rows.append(row)
+
+    assert len(rows) == complete
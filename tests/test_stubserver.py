@@ -0,0 +1,96 @@
+import json
+import pytest
+import requests
+from similarweb import ContentClient, MobileClient, SourcesClient, TrafficClient
+from similarweb import Transport
+from similarweb import helpers
+from similarweb.stubserver import StubServer
+from similarweb.transport import RetryPolicy
+
+from .conftest import FIXTURES
+
+
+@pytest.fixture(scope = "module")
+def server():
+    with StubServer(FIXTURES) as stub:
+        yield stub
+
+
+def stub_client(client_class, server, user_key = "test_key", **options):
+    return client_class(user_key, transport = Transport(), api_root = server.url,
+                        single_flight = False, **options)
+
+
+def test_api_root_replaces_scheme_and_host():
+    client = SourcesClient("test_key", api_root = "http://127.0.0.1:8000/")
+
+    assert client.base_url == "http://127.0.0.1:8000/Site/{0}/{1}/"
+    assert SourcesClient.base_url == "https://api.similarweb.com/Site/{0}/{1}/"
+
+
+def test_api_root_defaults_to_environment(monkeypatch):
+    monkeypatch.setenv("SIMILARWEB_API_ROOT", "http://localhost:9000")
+
+    assert MobileClient("test_key").base_url == "http://localhost:9000/Mobile/{0}/{1}/"
+
+
+def test_every_client_is_served_fixtures(server):
+    traffic = stub_client(TrafficClient, server)
+    content = stub_client(ContentClient, server)
+    sources = stub_client(SourcesClient, server)
+    mobile = stub_client(MobileClient, server)
+
+    assert traffic.visits("example.com", "monthly", "11-2014", "12-2014") == {
+        "2014-11-01": 12897241, "2014-12-01": 13917811}
+    assert "GlobalRank" in traffic.traffic("example.com")
+    assert content.category("example.com") == {"Category": "Sports/Basketball"}
+    assert sources.social_referrals("example.com")
+    assert mobile.app_details("com.example.app", "google")["Title"]
+
+
+def test_invalid_user_key_gets_invalid_key_payload(server):
+    client = stub_client(TrafficClient, server, user_key = "invalid")
+
+    assert client.visits("example.com", "monthly", "11-2014", "12-2014") == helpers.BAD_API_KEY
+
+
+def test_pages_end_after_configured_count():
+    with StubServer(FIXTURES, pages = 3) as stub:
+        client = stub_client(SourcesClient, stub)
+        rows = list(client.iter_referrals("example.com", "11-2014", "12-2014"))
+        last_page = requests.get(stub.url + "/Site/example.com/v1/referrals"
+                                 "?start=11-2014&end=12-2014&UserKey=k&page=3").json()
+        past_end = requests.get(stub.url + "/Site/example.com/v1/referrals"
+                                "?start=11-2014&end=12-2014&UserKey=k&page=4")
+
+    assert len(rows) == 30
+    assert last_page["Next"] is None
+    assert past_end.status_code == 400
+
+
+def test_error_rate_fails_requests():
+    with StubServer(FIXTURES, error_rate = 1) as stub:
+        client = stub_client(TrafficClient, stub)
+        client.transport = Transport(retry = RetryPolicy(max_attempts = 2, backoff = 0))
+
+        assert client.traffic("example.com") == helpers.BAD_TRANSPORT
+        assert stub.requests == 2
+
+
+def test_rate_throttles_per_user_key():
+    with StubServer(FIXTURES, rate = 1, burst = 2) as stub:
+        url = stub.url + "/Site/example.com/v1/traffic?UserKey={0}"
+        statuses = [requests.get(url.format("a")).status_code for _ in range(3)]
+        other = requests.get(url.format("b"))
+        throttled = requests.get(url.format("a"))
+
+    assert statuses == [200, 200, 429]
+    assert other.status_code == 200
+    assert throttled.headers["Retry-After"] == "1"
+
+
+def test_unknown_path_is_not_found(server):
+    response = requests.get(server.url + "/Site/example.com/v1/nothing")
+
+    assert response.status_code == 404
+    assert "Message" in json.loads(response.text)
@@ -3,6 +3,8 @@ import httpretty
 import os
 from similarweb import TrafficClient
 
+from .conftest import FakeResponse
+
 TD = os.path.dirname(os.path.realpath(__file__))
 
 def test_traffic_client_has_user_key():
@@ -917,3 +919,185 @@ def test_traffic_client_bounce_rate_response_from_good_inputs():
 
         assert result == expected
 
+
+
+@httpretty.activate
+def test_traffic_client_visits_many_reports_each_domain():
+    good_url = ("https://api.similarweb.com/Site/"
+                "example.com/v1/visits?gr=monthly"
+                "&start=11-2014&end=12-2014"
+                "&md=False&UserKey=test_key")
+    bad_url = ("https://api.similarweb.com/Site/"
+               "bad_url/v1/visits?gr=monthly"
+               "&start=11-2014&end=12-2014"
+               "&md=False&UserKey=test_key")
+    for target_url, fixture in [(good_url, "visits_good"),
+                                (bad_url, "visits_url_malformed")]:
+        f = "{0}/fixtures/traffic_client_{1}_response.json".format(TD, fixture)
+        with open(f) as data_file:
+            stringified = json.dumps(json.load(data_file))
+            httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+    client = TrafficClient("test_key")
+    results = dict(client.visits_many(["example.com", "bad_url"], "monthly",
+                                      "11-2014", "12-2014", False,
+                                      max_workers = 2))
+
+    assert results == {"example.com": {"2014-11-01": 12897241,
+                                       "2014-12-01": 13917811},
+                       "bad_url": {"Error": "Malformed or Unknown URL"}}
+
+
+def test_traffic_client_visits_many_does_not_abort_on_exceptions():
+    class BrokenTransport(object):
+        def get(self, url):
+            raise IOError("connection reset")
+
+    client = TrafficClient("test_key", transport = BrokenTransport())
+    results = list(client.visits_many(["example.com", "example.org"],
+                                      "monthly", "11-2014", "12-2014"))
+
+    assert sorted(results) == [("example.com", {"Error": "Unknown Error"}),
+                               ("example.org", {"Error": "Unknown Error"})]
+
+
+def test_traffic_client_visits_many_reads_domains_as_workers_free_up():
+    class EmptyTransport(object):
+        status_code = 200
+        content = b"{}"
+
+        def get(self, url):
+            return self
+
+    taken = []
+
+    def domains():
+        for i in range(1000):
+            taken.append(i)
+            yield "site{0}.com".format(i)
+
+    client = TrafficClient("test_key", transport = EmptyTransport())
+    results = client.visits_many(domains(), "monthly", "11-2014", "12-2014",
+                                 max_workers = 4)
+    next(results)
+
+    assert len(taken) <= 5
+    assert len(list(results)) == 999
+
+
+def test_traffic_client_full_url_is_per_thread():
+    import threading
+
+    class EmptyTransport(object):
+        status_code = 200
+        content = b""
+
+        def get(self, url):
+            return self
+
+    client = TrafficClient("test_key", transport = EmptyTransport())
+    client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+    main_thread_url = client.full_url
+    other_thread_urls = []
+
+    def worker():
+        client.visits("example.org", "monthly", "11-2014", "12-2014", False)
+        other_thread_urls.append(client.full_url)
+
+    t = threading.Thread(target = worker)
+    t.start()
+    t.join()
+
+    assert "example.com" in main_thread_url
+    assert client.full_url == main_thread_url
+    assert "example.org" in other_thread_urls[0]
+
+
+def test_month_shards_split_long_ranges():
+    from similarweb import helpers
+
+    assert helpers.month_shards("11-2014", "12-2016", 12) == [
+        ("11-2014", "10-2015"), ("11-2015", "10-2016"), ("11-2016", "12-2016")]
+    assert helpers.month_shards("12-2014", "11-2014", 12) == [("12-2014", "11-2014")]
+
+
+def test_traffic_client_sharded_merges_shards_in_date_order():
+    calls = []
+
+    class ShardedTransport(object):
+        def get(self, url):
+            calls.append(url)
+            start = [p for p in url.split("&") if p.startswith("start=")][0]
+            month, year = start[len("start="):].split("-")
+            day = "{0}-{1:02d}-01".format(year, int(month))
+            if "start=1-2015" in url and len(calls) < 4:
+                raise IOError("connection reset")
+            return FakeResponse({"Values": [{"Date": day, "Value": 1}]})
+
+    client = TrafficClient("test_key", transport = ShardedTransport())
+    result = client.sharded("visits", "example.com", "monthly",
+                            "11-2014", "4-2015", False,
+                            months_per_shard = 2, max_workers = 1)
+
+    assert list(result.items()) == [("2014-11-01", 1), ("2015-01-01", 1),
+                                    ("2015-03-01", 1)]
+    assert len(calls) == 4
+
+
+def test_traffic_client_sharded_rejects_unknown_metric():
+    client = TrafficClient("test_key")
+    result = client.sharded("traffic", "example.com", "monthly",
+                            "11-2014", "12-2014")
+
+    assert result == {"Error": "Metric must be 'visits', 'page_views', "
+                               "'visit_duration' or 'bounce_rate'"}
+
+
+def test_traffic_client_sharded_rejects_shards_under_one_month():
+    import pytest
+    from similarweb import helpers
+    client = TrafficClient("test_key")
+
+    for months_per_shard in (0, -3):
+        result = client.sharded("visits", "example.com", "monthly",
+                                "11-2014", "12-2014",
+                                months_per_shard = months_per_shard)
+        assert result == {"Error": "months_per_shard must be at least 1"}
+    with pytest.raises(ValueError):
+        helpers.month_shards("11-2014", "12-2014", 0)
+
+
+def test_traffic_client_engagement_aligns_metrics_by_date():
+    class MetricTransport(object):
+        def get(self, url):
+            endpoint = url.split("/v1/")[1].split("?")[0]
+            values = {"visits": [("2014-11-01", 10), ("2014-12-01", 20)],
+                      "bouncerate": [("2014-12-01", 0.5)]}[endpoint]
+            body = {"Values": [{"Date": d, "Value": v} for d, v in values]}
+            return FakeResponse(body)
+
+    client = TrafficClient("test_key", transport = MetricTransport())
+    result = client.engagement("example.com", "monthly", "11-2014", "12-2014",
+                               False, metrics = ["visits", "bounce_rate"])
+
+    assert list(result.items()) == [
+        ("2014-11-01", {"visits": 10, "bounce_rate": None}),
+        ("2014-12-01", {"visits": 20, "bounce_rate": 0.5})]
+
+
+@httpretty.activate
+def test_traffic_client_engagement_returns_metric_errors():
+    expected = {"Error": "user_key_invalid"}
+    for endpoint, metric in [("visits", "visits"), ("pageviews", "page_views")]:
+        target_url = ("https://api.similarweb.com/Site/"
+                      "example.com/v1/{0}?gr=monthly"
+                      "&start=11-2014&end=12-2014"
+                      "&md=False&UserKey=invalid_key").format(endpoint)
+        f = "{0}/fixtures/traffic_client_{1}_invalid_user_key_response.json".format(TD, metric)
+        with open(f) as data_file:
+            stringified = json.dumps(json.load(data_file))
+            httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+    client = TrafficClient("invalid_key")
+    result = client.engagement("example.com", "monthly", "11-2014", "12-2014",
+                               False, metrics = ["visits", "page_views"])
+
+    assert result == expected
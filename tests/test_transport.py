@@ -0,0 +1,210 @@
+import json
+import httpretty
+import os
+import requests
+import time
+from similarweb import TrafficClient, Transport
+from similarweb import transport
+from similarweb.transport import RetryPolicy, parse_retry_after
+
+TD = os.path.dirname(os.path.realpath(__file__))
+
+def test_transport_has_pool_settings():
+    t = Transport(pool_connections = 4, pool_maxsize = 32, timeout = 5)
+
+    assert t.pool_connections == 4
+    assert t.pool_maxsize == 32
+    assert t.timeout == 5
+
+
+def test_transport_mounts_pooled_adapter():
+    t = Transport(pool_maxsize = 32)
+    adapter = t.session.get_adapter("https://api.similarweb.com/")
+
+    assert adapter._pool_maxsize == 32
+
+
+def test_transport_without_keep_alive_closes_connections():
+    t = Transport(keep_alive = False)
+
+    assert t.session.headers["Connection"] == "close"
+
+
+def test_default_transport_is_shared():
+    assert transport.default_transport() is transport.default_transport()
+
+
+def test_client_has_no_transport_by_default():
+    client = TrafficClient("test_key")
+
+    assert client.transport is None
+
+
+@httpretty.activate
+def test_client_sends_requests_through_injected_transport():
+    calls = []
+
+    class RecordingTransport(Transport):
+        def get(self, url):
+            calls.append(url)
+            return Transport.get(self, url)
+
+    target_url = ("https://api.similarweb.com/Site/"
+                  "example.com/v1/visits?gr=monthly&start=11-2014&end=12-2014"
+                  "&md=False&UserKey=test_key")
+    f = "{0}/fixtures/traffic_client_visits_good_response.json".format(TD)
+    with open(f) as data_file:
+        stringified = json.dumps(json.load(data_file))
+        httpretty.register_uri(httpretty.GET, target_url, body=stringified)
+        client = TrafficClient("test_key", transport = RecordingTransport())
+        result = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+
+    assert calls == [target_url]
+    assert result == {"2014-11-01": 12897241, "2014-12-01": 13917811}
+
+
+def visits_target_url():
+    return ("https://api.similarweb.com/Site/"
+            "example.com/v1/visits?gr=monthly&start=11-2014&end=12-2014"
+            "&md=False&UserKey=test_key")
+
+
+def visits_good_body():
+    f = "{0}/fixtures/traffic_client_visits_good_response.json".format(TD)
+    with open(f) as data_file:
+        return json.dumps(json.load(data_file))
+
+
+@httpretty.activate
+def test_transport_retries_transient_statuses():
+    httpretty.register_uri(httpretty.GET, visits_target_url(),
+                           responses=[httpretty.Response(body="Bad Gateway", status=502),
+                                      httpretty.Response(body=visits_good_body())])
+    t = Transport(retry = RetryPolicy(backoff = 0))
+    client = TrafficClient("test_key", transport = t)
+    result = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+
+    assert result == {"2014-11-01": 12897241, "2014-12-01": 13917811}
+    assert len(httpretty.latest_requests()) == 2
+
+
+@httpretty.activate
+def test_transport_reads_the_body_and_stamps_when_headers_arrived():
+    httpretty.register_uri(httpretty.GET, visits_target_url(),
+                           body=visits_good_body())
+    before = time.time()
+    response = Transport().get(visits_target_url())
+
+    assert before <= response.received <= time.time()
+    assert response.content == visits_good_body().encode("utf-8")
+
+
+@httpretty.activate
+def test_transport_reports_exhausted_retries_distinctly():
+    httpretty.register_uri(httpretty.GET, visits_target_url(),
+                           body="Service Unavailable", status=503)
+    t = Transport(retry = RetryPolicy(max_attempts = 3, backoff = 0))
+    client = TrafficClient("test_key", transport = t)
+    result = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+
+    assert result == {"Error": "API unreachable or unavailable, retries exhausted"}
+    assert len(httpretty.latest_requests()) == 3
+
+
+@httpretty.activate
+def test_transport_without_retry_policy_sends_once():
+    httpretty.register_uri(httpretty.GET, visits_target_url(),
+                           body="Too Many Requests", status=429)
+    client = TrafficClient("test_key", transport = Transport(retry = None))
+    result = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+
+    assert result == {"Error": "Throttled by the API, retries exhausted"}
+    assert len(httpretty.latest_requests()) == 1
+
+
+def test_transport_retries_connection_errors():
+    attempts = []
+
+    def flaky_get(url, **kwargs):
+        attempts.append(url)
+        raise requests.ConnectionError("connection reset")
+
+    t = Transport(retry = RetryPolicy(max_attempts = 2, backoff = 0))
+    t.session.get = flaky_get
+    client = TrafficClient("test_key", transport = t)
+    result = client.visits("example.com", "monthly", "11-2014", "12-2014", False)
+
+    assert result == {"Error": "API unreachable or unavailable, retries exhausted"}
+    assert len(attempts) == 2
+
+
+def test_retry_policy_backs_off_exponentially_with_jitter():
+    policy = RetryPolicy(backoff = 1, max_backoff = 5)
+
+    assert all(0 <= policy.delay(1) <= 1 for _ in range(20))
+    assert all(0 <= policy.delay(3) <= 4 for _ in range(20))
+    assert all(0 <= policy.delay(10) <= 5 for _ in range(20))
+    assert RetryPolicy(backoff = 1, jitter = False).delay(3) == 4
+
+
+def test_retry_policy_gives_up_at_deadline():
+    import time
+    policy = RetryPolicy(max_attempts = 10, backoff = 5, jitter = False,
+                         deadline = 1)
+
+    assert not policy.wait(1, time.time())
+
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_retry_policy_honors_retry_after():
+    class ThrottledResponse(object):
+        status_code = 429
+        headers = {"Retry-After": "2"}
+
+    policy = RetryPolicy(backoff = 0.1)
+
+    assert policy.is_transient(ThrottledResponse())
+    assert policy.delay(1, ThrottledResponse()) == 2.0
+
+
+def test_transport_retries_a_body_cut_short():
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    body = visits_good_body().encode("utf-8")
+    requests_seen = []
+
+    class CutShortHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen.append(self.path)
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if len(requests_seen) == 1:
+                self.wfile.write(body[:10])
+                self.close_connection = True
+            else:
+                self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), CutShortHandler)
+    thread = threading.Thread(target = server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        url = "http://127.0.0.1:{0}/".format(server.server_address[1])
+        response = Transport(retry = RetryPolicy(backoff = 0)).get(url)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert response.attempts == 2
+    assert response.content == body